@@ -1,4 +1,4 @@
-from lark import Lark
+from src.LLVM_parser import get_parser
 from src.LLVM_frontend import *
 from src.LLVM_backend import *
 
@@ -112,9 +112,7 @@ def load_ins(filepath):
 
 
 if __name__ == "__main__":
-    with open('lattests/grammar.lark', 'r', encoding='utf-8') as file:
-        grammar = file.read()
-    parser = Lark(grammar, parser='lalr', start='start')
+    parser = get_parser()
 
     test_cases = create_test_cases_2(parser)
     # test_cases = [test_cases[2]]  #Można odkomentować do testowania konkretnego przypadku
@@ -132,7 +130,7 @@ if __name__ == "__main__":
 
 
             print(test_tree.pretty()) 
-            backend = LLVM_QuadCode(function_table)
+            backend = LLVM_QuadCode(function_table, analyzer.annotations)
             backend.visit(test_tree)
             print("\n\nKOD CZWÓRKOWY")
             for q in backend.quadruples:
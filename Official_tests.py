@@ -1,4 +1,5 @@
-from lark import Lark, UnexpectedInput, UnexpectedToken, UnexpectedCharacters
+from lark import UnexpectedInput, UnexpectedToken, UnexpectedCharacters
+from src.LLVM_parser import get_parser
 from src.LLVM_frontend import *
 
 
@@ -78,10 +79,7 @@ def load_ins(filepath):
 
 
 if __name__ == "__main__":
-    with open('lattests/grammar.lark', 'r', encoding='utf-8') as file:
-        grammar = file.read()
-        
-    parser = Lark(grammar, parser='lalr', start='start')
+    parser = get_parser()
 
     test_cases = create_bad_test_cases(parser)
 
@@ -0,0 +1,105 @@
+import glob
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from src.LLVM_parser import get_parser
+from src.LLVM_frontend import LatteCompiler
+from src.LLVM_optimizer import PASSES
+
+# Testy przebiegów optymalizujących: każdy program z lattests/opt kompilujemy
+# do LLVM bez optymalizacji, z każdym przebiegiem osobno i ze wszystkimi naraz,
+# uruchamiamy i porównujemy wyjście oraz kod wyjścia z wersją bez optymalizacji
+# (a wyjście także z plikiem .output, jeśli jest). Potrzebne są llc i g++.
+
+CONFIGURATIONS = [('bez optymalizacji', ())] + [(name, (name,)) for name in PASSES] + [('wszystkie', PASSES)]
+
+# Dzielenie przez zmienną, 0 albo -1 może zakończyć program błędem. Nieużytego
+# takiego dzielenia llc i tak nie wykona, więc sam przebieg dce sprawdzamy w IR:
+# nie może usunąć żadnego z nich
+TRAPPING_DIVISION = re.compile(r'= (sdiv|srem) i32 [^,]+, (%\S+|0|-1)$', re.MULTILINE)
+
+
+def build_runtime(workdir):
+    runtime = os.path.join(workdir, 'runtime.o')
+    subprocess.run(['g++', '-O2', '-c', 'src/predefined.cpp', '-o', runtime], check=True)
+    return runtime
+
+
+def compile_program(parser, code, passes):
+    _, llvm = LatteCompiler(parser, passes=passes).compile(code)
+    return llvm
+
+
+def run_program(llvm, workdir, runtime, stdin):
+    # (wyjście, kod wyjścia); ujemny kod to sygnał, np. -8 dla SIGFPE
+    source = os.path.join(workdir, 'program.ll')
+    with open(source, 'w') as file:
+        file.write(llvm)
+    assembly = os.path.join(workdir, 'program.s')
+    executable = os.path.join(workdir, 'program')
+    subprocess.run(['llc', '-O0', '-relocation-model=pic', source, '-o', assembly], check=True)
+    subprocess.run(['g++', assembly, runtime, '-o', executable], check=True)
+    result = subprocess.run([executable], input=stdin, capture_output=True, text=True, timeout=10)
+    return result.stdout, result.returncode
+
+
+def load_ins(filepath):
+    program = ""
+    with open(filepath, mode='r') as f:
+        program = f.read()
+    return program
+
+
+if __name__ == "__main__":
+    if shutil.which('llc') is None or shutil.which('g++') is None:
+        print("Brak llc albo g++, pomijam testy optymalizacji")
+        sys.exit(0)
+
+    parser = get_parser()
+    passed = 0
+    not_passed = 0
+    print("%"*30 + " TESTING OPT " + "%"*30)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        runtime = build_runtime(workdir)
+        for filename in sorted(glob.glob('lattests/opt/*.lat')):
+            base = os.path.splitext(filename)[0]
+            name = os.path.basename(base)
+            code = load_ins(filename)
+            stdin = load_ins(base + '.input') if os.path.exists(base + '.input') else ''
+            expected = load_ins(base + '.output') if os.path.exists(base + '.output') else None
+
+            failures = []
+            try:
+                unoptimized = compile_program(parser, code, ())
+                reference = run_program(unoptimized, workdir, runtime, stdin)
+                if expected is not None and reference[0] != expected:
+                    failures.append("bez optymalizacji: wyjście różne od .output")
+                for description, passes in CONFIGURATIONS[1:]:
+                    llvm = compile_program(parser, code, passes)
+                    result = run_program(llvm, workdir, runtime, stdin)
+                    if result != reference:
+                        failures.append(f"{description}: {result!r} zamiast {reference!r}")
+                    if passes == ('dce',):
+                        kept = len(TRAPPING_DIVISION.findall(llvm))
+                        expected_kept = len(TRAPPING_DIVISION.findall(unoptimized))
+                        if kept != expected_kept:
+                            failures.append(f"dce: zostało {kept} z {expected_kept} dzieleń mogących przerwać program")
+            except Exception as e:
+                failures.append(str(e))
+
+            if failures:
+                print(f"\n\tFAILED: {name}")
+                for failure in failures:
+                    print(f"\t\t{failure}")
+                not_passed += 1
+            else:
+                print(f"\n\tPASSED: {name}")
+                passed += 1
+
+    print("\n")
+    print(f"\tPrzeszło {passed}/{passed+not_passed} testów")
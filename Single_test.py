@@ -1,4 +1,4 @@
-from lark import Lark
+from src.LLVM_parser import get_parser
 from src.LLVM_frontend import *
 from src.LLVM_backend import *
 from Official_tests import parse_code
@@ -15,9 +15,7 @@ def load_lat(filepath):
 
 
 if __name__ == "__main__":
-    with open('lattests/grammar.lark', 'r', encoding='utf-8') as file:
-        grammar = file.read()
-    parser = Lark(grammar, parser='lalr', start='start')
+    parser = get_parser()
 
     # filename = 'examples/test06.lat'
     filename = 'lattests/good/core001.lat'
@@ -48,7 +46,7 @@ if __name__ == "__main__":
 
 
         print(tree.pretty()) 
-        backend = LLVM_QuadCode(function_table)
+        backend = LLVM_QuadCode(function_table, analyzer.annotations)
         backend.visit(tree)
         print("\n\nKOD CZWÓRKOWY")
         for q in backend.quadruples:
@@ -0,0 +1,41 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.LLVM_batch import build
+
+
+def make_corpus(source_dir, copies, target_dir):
+    # Powielamy katalog z testami, żeby każdy proces dostał sensowną porcję pracy
+    for i in range(copies):
+        shutil.copytree(source_dir, os.path.join(target_dir, f"copy{i:03}"))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Przepustowość latc build w zależności od -j')
+    arg_parser.add_argument('source', nargs='?', default=os.path.join(ROOT, 'lattests', 'good'))
+    arg_parser.add_argument('--copies', type=int, default=20)
+    arg_parser.add_argument('--max-jobs', type=int, default=os.cpu_count() or 1)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as corpus, tempfile.TemporaryDirectory() as output:
+        make_corpus(args.source, args.copies, corpus)
+
+        baseline = None
+        jobs = 1
+        while jobs <= args.max_jobs:
+            start = time.perf_counter()
+            results = build([corpus], jobs=jobs, output_dir=output)
+            wall = time.perf_counter() - start
+            throughput = len(results) / wall
+            if baseline is None:
+                baseline = throughput
+            print(f"-j {jobs:<3} {len(results)} plików  {wall:6.2f} s  "
+                  f"{throughput:8.1f} plików/s  x{throughput / baseline:.2f}")
+            jobs *= 2
@@ -0,0 +1,34 @@
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.LLVM_frontend import LatteCompiler
+from src.LLVM_cfg import build_cfg
+from benchmarks.latte_gen import generate_program
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Czas budowy CFG dla dużych wygenerowanych funkcji')
+    arg_parser.add_argument('sizes', nargs='*', type=int, default=[250, 500, 1000, 2000],
+                            help='liczba instrukcji Latte w jednej funkcji')
+    arg_parser.add_argument('-r', '--repeats', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    compiler = LatteCompiler()
+    for size in args.sizes:
+        quadruples = compiler.compile_program(generate_program(1, size))
+
+        best = float('inf')
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            functions = build_cfg(quadruples)
+            best = min(best, time.perf_counter() - start)
+
+        blocks = sum(len(cfg.blocks) for cfg in functions)
+        edges = sum(len(succ) for cfg in functions for succ in cfg.succ)
+        print(f"{size:>6} instrukcji Latte  {len(quadruples):>7} czwórek  {blocks:>6} bloków  "
+              f"{edges:>6} krawędzi  {best*1000:8.2f} ms  ({best / len(quadruples) * 1e6:5.2f} us/czwórkę)")
@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.LLVM_frontend import LatteCompiler
+from benchmarks.latte_gen import generate_program
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Czas kompilacji end-to-end z podziałem na fazy')
+    arg_parser.add_argument('--functions', type=int, default=10)
+    arg_parser.add_argument('--statements', type=int, default=60)
+    arg_parser.add_argument('--no-assignments', action='store_true')
+    arg_parser.add_argument('-r', '--repeats', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    code = generate_program(args.functions, args.statements, assignments=not args.no_assignments)
+    compiler = LatteCompiler()
+    print(f"Program: {len(code.splitlines())} linii\n")
+
+    best = {}
+    for _ in range(args.repeats):
+        timings = {}
+        start = time.perf_counter()
+        tree = compiler.parse(code)
+        timings['parse'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compiler.check(tree)
+        timings['check'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compiler.compile(code)
+        timings['compile (całość)'] = time.perf_counter() - start
+
+        for phase, seconds in timings.items():
+            best[phase] = min(best.get(phase, float('inf')), seconds)
+
+    for phase, seconds in best.items():
+        print(f"{phase:<18} {seconds*1000:9.1f} ms")
@@ -0,0 +1,87 @@
+import argparse
+import filecmp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.LLVM_frontend import LatteCompiler
+
+RUNTIME = os.path.join(ROOT, 'src', 'predefined.cpp')
+MODES = (('builder', []), ('copy', ['-DLATTE_COPY_CONCAT']))
+
+
+def append_program(size, chunk):
+    # Napis o długości size budowany dopisywaniem po chunk znaków, jak w core001repStr.lat
+    return (
+        "int main() {\n"
+        "  string s = \"\";\n"
+        "  int i = 0;\n"
+        f"  while (i < {size // chunk}) {{\n"
+        f"    s = s + \"{'x' * chunk}\";\n"
+        "    i++;\n"
+        "  }\n"
+        "  printString(s);\n"
+        "  return 0;\n"
+        "}\n"
+    )
+
+
+def build_runtimes(workdir, cxx):
+    runtimes = {}
+    for mode, flags in MODES:
+        runtimes[mode] = os.path.join(workdir, f'runtime_{mode}.o')
+        subprocess.run([cxx, '-O2', *flags, '-c', RUNTIME, '-o', runtimes[mode]], check=True)
+    return runtimes
+
+
+def build(workdir, llc, cxx, runtimes, code, name):
+    _, llvm = LatteCompiler().compile(code)
+    source = os.path.join(workdir, f'{name}.ll')
+    with open(source, 'w') as file:
+        file.write(llvm)
+    assembly = os.path.join(workdir, f'{name}.s')
+    subprocess.run([llc, '-O2', '-relocation-model=pic', source, '-o', assembly], check=True)
+
+    executables = {}
+    for mode, runtime in runtimes.items():
+        executables[mode] = os.path.join(workdir, f'{name}_{mode}')
+        subprocess.run([cxx, assembly, runtime, '-o', executables[mode]], check=True)
+    return executables
+
+
+def run(executable, output_path):
+    with open(output_path, 'w') as output:
+        start = time.perf_counter()
+        subprocess.run([executable], stdout=output, check=True)
+        return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Budowanie napisu dopisywaniem: Concat z buforem vs kopiowanie')
+    arg_parser.add_argument('sizes', nargs='*', type=int, default=[128 * 1024, 256 * 1024, 512 * 1024, 1024 * 1024],
+                            help='długości budowanych napisów w bajtach')
+    arg_parser.add_argument('--chunk', type=int, default=16, help='ile znaków dopisuje jedno s = s + "..."')
+    arg_parser.add_argument('-r', '--runs', type=int, default=3)
+    arg_parser.add_argument('--llc', default='llc')
+    arg_parser.add_argument('--cxx', default='g++')
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        runtimes = build_runtimes(workdir, args.cxx)
+        print(f"{'rozmiar':>10} {'builder':>12} {'copy':>12}  przyspieszenie")
+        for size in args.sizes:
+            name = f'append{size}'
+            executables = build(workdir, args.llc, args.cxx, runtimes, append_program(size, args.chunk), name)
+            best = {}
+            for mode, _ in MODES:
+                output_path = os.path.join(workdir, f'{name}_{mode}.out')
+                best[mode] = min(run(executables[mode], output_path) for _ in range(args.runs))
+            same = filecmp.cmp(os.path.join(workdir, f'{name}_builder.out'),
+                               os.path.join(workdir, f'{name}_copy.out'), shallow=False)
+            print(f"{size:>10} {best['builder']*1000:9.1f} ms {best['copy']*1000:9.1f} ms  "
+                  f"{best['copy'] / best['builder']:6.1f}x{'' if same else '  WYJŚCIE RÓŻNE'}")
@@ -0,0 +1,48 @@
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.LLVM_parser import get_parser
+from src.LLVM_frontend import SygnatureAnalyzer, SemanticAnalyzer
+from src.LLVM_backend import LLVM_QuadCode
+from benchmarks.latte_gen import generate_long_expr
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Type checking i kod czwórkowy dla bardzo długich wyrażeń')
+    arg_parser.add_argument('sizes', nargs='*', type=int, default=[10000, 20000, 40000, 80000])
+    arg_parser.add_argument('--recursion-limit', type=int, default=200,
+                            help='limit rekurencji podczas analizy, pokazuje że stos Pythona jest ograniczony')
+    args = arg_parser.parse_args()
+
+    parser = get_parser()
+    for operator in ('+', '*'):
+        for size in args.sizes:
+            tree = parser.parse(generate_long_expr(size, operator))
+            SIG_analyzer = SygnatureAnalyzer()
+            SIG_analyzer.visit(tree)
+            function_table = SIG_analyzer.function_table
+
+            old_limit = sys.getrecursionlimit()
+            sys.setrecursionlimit(args.recursion_limit)
+            try:
+                analyzer = SemanticAnalyzer(function_table)
+                check = timed(lambda: analyzer.visit(tree))
+                backend = LLVM_QuadCode(function_table, analyzer.annotations)
+                quads = timed(lambda: backend.visit(tree))
+            finally:
+                sys.setrecursionlimit(old_limit)
+
+            print(f"'{operator}' x {size:<7} SemanticAnalyzer {check*1000:8.1f} ms "
+                  f"({check / size * 1e6:5.2f} us/operand)   "
+                  f"LLVM_QuadCode {quads*1000:8.1f} ms ({quads / size * 1e6:5.2f} us/operand)")
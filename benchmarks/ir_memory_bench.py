@@ -0,0 +1,60 @@
+import argparse
+import dataclasses
+import gc
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.LLVM_frontend import LatteCompiler
+from benchmarks.latte_gen import generate_program
+
+
+def legacy_class(cls, cache={}):
+    # Ta sama klasa jako zwykły @dataclass z __dict__, czyli stara reprezentacja IR
+    if cls not in cache:
+        fields = [(field.name, field.type) for field in dataclasses.fields(cls)]
+        cache[cls] = dataclasses.make_dataclass(cls.__name__, fields)
+    return cache[cls]
+
+
+def copy_instructions(instructions, make_class):
+    copies = []
+    for instruction in instructions:
+        cls = make_class(type(instruction))
+        values = [getattr(instruction, field.name) for field in dataclasses.fields(instruction)]
+        copies.append(cls(*values))
+    return copies
+
+
+def measure(instructions, make_class):
+    # Mierzymy tylko same rekordy instrukcji, operandy są współdzielone w obu wariantach
+    gc.collect()
+    tracemalloc.start()
+    copies = copy_instructions(instructions, make_class)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del copies
+    return size
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Pamięć na instrukcję kodu czwórkowego')
+    arg_parser.add_argument('--functions', type=int, default=20)
+    arg_parser.add_argument('--statements', type=int, default=80)
+    args = arg_parser.parse_args()
+
+    code = generate_program(args.functions, args.statements)
+    instructions = LatteCompiler().compile_program(code)
+    for cls in {type(instruction) for instruction in instructions}:
+        legacy_class(cls)
+
+    count = len(instructions)
+    before = measure(instructions, legacy_class)
+    after = measure(instructions, lambda cls: cls)
+    print(f"Instrukcji: {count}\n")
+    print(f"@dataclass (z __dict__)   {before / count:7.1f} B/instrukcję   {before / 2**20:7.2f} MiB")
+    print(f"@dataclass(slots=True)    {after / count:7.1f} B/instrukcję   {after / 2**20:7.2f} MiB")
+    print(f"redukcja                  x{before / after:.2f}")
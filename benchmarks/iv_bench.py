@@ -0,0 +1,72 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.IRdataclasses import BinaryOperation
+from src.LLVM_frontend import LatteCompiler
+from src.LLVM_backend import LLVM_QuadCode
+from src.LLVM_cfg import build_cfg
+from src.LLVM_licm import loop_nests
+from src.LLVM_optimizer import Optimizer, PASSES
+from benchmarks.latte_gen import generate_loop_program
+
+
+def quadruples_of(compiler, code):
+    tree = compiler.parse(code)
+    function_table, annotations = compiler.check(tree)
+    backend = LLVM_QuadCode(function_table, annotations)
+    backend.visit(tree)
+    return backend.get_instructions(), function_table
+
+
+def loop_operations(quadruples):
+    # Mnożenia i dodawania/odejmowania w pętlach; operacja w pętli o głębokości d
+    # liczy się jak 10^d wykonań, żeby wewnętrzne pętle ważyły tyle, co w czasie działania
+    multiplications = additions = 0
+    for cfg in build_cfg(quadruples):
+        nests = loop_nests(cfg)
+        for block in cfg.blocks:
+            depth = sum(1 for labels in nests if block.label in labels)
+            if depth == 0:
+                continue
+            for instruction in block.instructions:
+                if isinstance(instruction, BinaryOperation):
+                    if instruction.operator == 'times_op':
+                        multiplications += 10 ** depth
+                    elif instruction.operator in ('plus_op', 'minus_op'):
+                        additions += 10 ** depth
+    return multiplications, additions
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Redukcja mocy: mnożenia w pętlach przed i po przebiegu iv')
+    arg_parser.add_argument('files', nargs='*', help='pliki .lat; domyślnie examples/core*.lat i program wygenerowany')
+    arg_parser.add_argument('--functions', type=int, default=10)
+    args = arg_parser.parse_args()
+
+    compiler = LatteCompiler()
+    sources = [(path, open(path).read()) for path in args.files]
+    if not sources:
+        sources = [(path, open(path).read()) for path in sorted(glob.glob(os.path.join(ROOT, 'examples', 'core*.lat')))]
+        sources.append(('wygenerowany (pętle)', generate_loop_program(args.functions)))
+
+    without_iv = tuple(name for name in PASSES if name != 'iv')
+    print(f"{'plik':<24} {'mnożenia':>18} {'dodawania':>18}  iv    czas")
+    for name, code in sources:
+        quadruples, function_table = quadruples_of(compiler, code)
+        before = loop_operations(Optimizer(without_iv, function_table).run(quadruples))
+
+        quadruples, function_table = quadruples_of(compiler, code)
+        optimizer = Optimizer(PASSES, function_table)
+        start = time.perf_counter()
+        optimized = optimizer.run(quadruples)
+        seconds = time.perf_counter() - start
+        after = loop_operations(optimized)
+
+        print(f"{os.path.basename(name):<24} {before[0]:>8} -> {after[0]:<7} {before[1]:>8} -> {after[1]:<7} "
+              f"{optimizer.stats.get('iv', 0):<5} {seconds*1000:.1f} ms")
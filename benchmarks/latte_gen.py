@@ -0,0 +1,149 @@
+import random
+
+
+def generate_expr(rng, int_vars, depth=0):
+    choice = rng.random()
+    if depth > 3 or choice < 0.3:
+        return str(rng.randint(0, 100)) if choice < 0.15 or not int_vars else rng.choice(int_vars)
+    if choice < 0.8:
+        op = rng.choice(['+', '-', '*'])
+        return f"{generate_expr(rng, int_vars, depth + 1)} {op} {generate_expr(rng, int_vars, depth + 1)}"
+    return f"({generate_expr(rng, int_vars, depth + 1)})"
+
+
+def generate_cond(rng, int_vars):
+    relop = rng.choice(['<', '<=', '>', '>=', '==', '!='])
+    cond = f"{generate_expr(rng, int_vars, 2)} {relop} {generate_expr(rng, int_vars, 2)}"
+    if rng.random() < 0.3:
+        cond = f"{cond} && {rng.choice(['true', 'false'])}"
+    return cond
+
+
+def generate_statements(rng, count, int_vars, indent, depth=0, assignments=True):
+    lines = []
+    pad = "    " * indent
+    for _ in range(count):
+        choice = rng.random()
+        if choice < 0.3 or not int_vars:
+            name = f"v{len(int_vars)}"
+            lines.append(f"{pad}int {name} = {generate_expr(rng, int_vars)};")
+            int_vars.append(name)
+        elif choice < 0.5 and assignments:
+            lines.append(f"{pad}{rng.choice(int_vars)} = {generate_expr(rng, int_vars)};")
+        elif choice < 0.6:
+            lines.append(f"{pad}printInt({generate_expr(rng, int_vars)});")
+        elif choice < 0.7:
+            lines.append(f"{pad}{rng.choice(int_vars)}++;")
+        elif choice < 0.85 and depth < 3:
+            lines.append(f"{pad}if ({generate_cond(rng, int_vars)}) {{")
+            lines.extend(generate_statements(rng, 4, list(int_vars), indent + 1, depth + 1, assignments))
+            lines.append(f"{pad}}} else {{")
+            lines.extend(generate_statements(rng, 4, list(int_vars), indent + 1, depth + 1, assignments))
+            lines.append(f"{pad}}}")
+        elif depth < 3:
+            counter = rng.choice(int_vars)
+            lines.append(f"{pad}while ({counter} < {rng.randint(1, 50)}) {{")
+            lines.extend(generate_statements(rng, 4, list(int_vars), indent + 1, depth + 1, assignments))
+            lines.append(f"{pad}    {counter}++;")
+            lines.append(f"{pad}}}")
+        else:
+            lines.append(f"{pad}printInt({generate_expr(rng, int_vars)});")
+    return lines
+
+
+def generate_program(functions=20, statements=100, seed=0, assignments=True):
+    # Losowy, ale poprawny semantycznie program w Latte do benchmarków
+    rng = random.Random(seed)
+    lines = []
+    for i in range(functions):
+        lines.append(f"int f{i}(int a, int b) {{")
+        lines.extend(generate_statements(rng, statements, ['a', 'b'], 1, assignments=assignments))
+        lines.append(f"    return {generate_expr(rng, ['a', 'b'])};")
+        lines.append("}")
+        lines.append("")
+
+    lines.append("int main() {")
+    for i in range(functions):
+        lines.append(f"    printInt(f{i}({i}, {i + 1}));")
+    lines.append("    return 0;")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_cse_program(functions=10, statements=100, seed=0):
+    # Program, w którym te same wyrażenia (także z zamienionymi argumentami i w obu
+    # gałęziach ifa) oraz te same konkatenacje napisów liczone są wielokrotnie
+    rng = random.Random(seed)
+    lines = []
+    for i in range(functions):
+        lines.append(f"int g{i}(int a, int b, int c, string s) {{")
+        pool = [generate_expr(rng, ['a', 'b', 'c'], 1) for _ in range(4)]
+
+        def use():
+            left, right = rng.choice(pool), rng.choice(pool)
+            if rng.random() < 0.5:
+                left, right = right, left
+            return f"printInt(({left}) {rng.choice(['+', '*'])} ({right}));"
+
+        for _ in range(statements):
+            choice = rng.random()
+            if choice < 0.7:
+                lines.append(f"    {use()}")
+            elif choice < 0.8:
+                lines.append(f"    if ({rng.choice(pool)} > {rng.choice(pool)}) {{ {use()} }} else {{ {use()} }}")
+            elif choice < 0.9:
+                suffix = rng.choice(['s', '"-"'])
+                lines.append(f"    printString(s + {suffix});")
+            else:
+                lines.append(f"    {rng.choice(['a', 'b', 'c'])}++;")
+        lines.append(f"    return {rng.choice(pool)};")
+        lines.append("}")
+        lines.append("")
+
+    lines.append("int main() {")
+    for i in range(functions):
+        lines.append(f"    printInt(g{i}({i}, {i + 1}, {i + 2}, \"x\"));")
+    lines.append("    return 0;")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_loop_program(functions=10, seed=0):
+    # Kernele numeryczne w stylu Latte: pętle while z i++ / j--, w których ciele
+    # liczone są iloczyny zmiennych indukcyjnych przez stałe, parametry i same siebie
+    rng = random.Random(seed)
+    lines = []
+    for i in range(functions):
+        lines.append(f"int kernel{i}(int n, int k) {{")
+        lines.append("    int s = 0;")
+        lines.append("    int i = 0;")
+        lines.append("    while (i < n) {")
+        lines.append(f"        s = s + i * {rng.randint(2, 9)} + i * k;")
+        if rng.random() < 0.5:
+            lines.append("        s = s + i * i;")
+        lines.append("        int j = n;")
+        lines.append("        while (j > 0) {")
+        lines.append(f"            s = s + j * i + j * {rng.randint(2, 9)};")
+        lines.append("            j--;")
+        lines.append("        }")
+        lines.append("        i++;")
+        lines.append("    }")
+        lines.append("    return s;")
+        lines.append("}")
+        lines.append("")
+
+    lines.append("int main() {")
+    for i in range(functions):
+        lines.append(f"    printInt(kernel{i}({i + 10}, {i + 3}));")
+    lines.append("    return 0;")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_long_expr(operands, op='+'):
+    terms = " {} ".format(op).join(str(i % 10) for i in range(operands))
+    return f"int main() {{\n    int x = {terms};\n    printInt(x);\n    return 0;\n}}\n"
+
+
+if __name__ == "__main__":
+    print(generate_program())
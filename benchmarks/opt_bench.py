@@ -0,0 +1,56 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.LLVM_frontend import LatteCompiler
+from src.LLVM_backend import LLVM_QuadCode
+from src.LLVM_optimizer import Optimizer, PASSES
+from benchmarks.latte_gen import generate_cse_program
+
+
+def quadruples_of(compiler, code):
+    tree = compiler.parse(code)
+    function_table, annotations = compiler.check(tree)
+    backend = LLVM_QuadCode(function_table, annotations)
+    backend.visit(tree)
+    return backend.get_instructions(), function_table
+
+
+def executable(quadruples):
+    # Etykiety i znaczniki bloków nie są wykonywane
+    return sum(1 for instruction in quadruples if type(instruction).__name__ != 'Label')
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Liczba czwórek przed i po optymalizacjach')
+    arg_parser.add_argument('files', nargs='*', help='pliki .lat; domyślnie lattests/opt i program wygenerowany')
+    arg_parser.add_argument('--passes', default=','.join(PASSES),
+                            help=f"przebiegi oddzielone przecinkami (domyślnie {','.join(PASSES)})")
+    arg_parser.add_argument('--functions', type=int, default=10)
+    arg_parser.add_argument('--statements', type=int, default=200)
+    args = arg_parser.parse_args()
+
+    passes = tuple(name for name in args.passes.split(',') if name)
+    compiler = LatteCompiler()
+    sources = [(path, open(path).read()) for path in args.files]
+    if not sources:
+        sources = [(path, open(path).read()) for path in sorted(glob.glob(os.path.join(ROOT, 'lattests', 'opt', '*.lat')))]
+        sources.append(('wygenerowany (CSE)', generate_cse_program(args.functions, args.statements)))
+
+    for name, code in sources:
+        quadruples, function_table = quadruples_of(compiler, code)
+        baseline = executable(Optimizer(passes=()).run(quadruples_of(compiler, code)[0]))
+
+        optimizer = Optimizer(passes, function_table)
+        start = time.perf_counter()
+        optimized = optimizer.run(quadruples)
+        seconds = time.perf_counter() - start
+
+        stats = ', '.join(f"{key}={value}" for key, value in optimizer.stats.items())
+        print(f"{os.path.basename(name)}: {executable(quadruples)} czwórek, po SSA {baseline}, "
+              f"po optymalizacjach {executable(optimized)}  ({stats})  {seconds*1000:.1f} ms")
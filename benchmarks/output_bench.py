@@ -0,0 +1,72 @@
+import argparse
+import filecmp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.LLVM_frontend import LatteCompiler
+
+RUNTIME = os.path.join(ROOT, 'src', 'predefined.cpp')
+MODES = (('buffered', []), ('unbuffered', ['-DLATTE_UNBUFFERED']))
+
+
+def print_program(count):
+    return (
+        "int main() {\n"
+        "  int i = 0;\n"
+        f"  while (i < {count}) {{\n"
+        "    printInt(i);\n"
+        "    i++;\n"
+        "  }\n"
+        "  return 0;\n"
+        "}\n"
+    )
+
+
+def build(workdir, llc, cxx, code):
+    _, llvm = LatteCompiler().compile(code)
+    source = os.path.join(workdir, 'program.ll')
+    with open(source, 'w') as file:
+        file.write(llvm)
+    assembly = os.path.join(workdir, 'program.s')
+    subprocess.run([llc, '-O2', '-relocation-model=pic', source, '-o', assembly], check=True)
+
+    executables = {}
+    for mode, flags in MODES:
+        runtime = os.path.join(workdir, f'runtime_{mode}.o')
+        subprocess.run([cxx, '-O2', *flags, '-c', RUNTIME, '-o', runtime], check=True)
+        executables[mode] = os.path.join(workdir, f'program_{mode}')
+        subprocess.run([cxx, assembly, runtime, '-o', executables[mode]], check=True)
+    return executables
+
+
+def run(executable, output_path):
+    with open(output_path, 'w') as output:
+        start = time.perf_counter()
+        subprocess.run([executable], stdout=output, check=True)
+        return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Wypisywanie liczb: środowisko z buforem vs flush po każdym wierszu')
+    arg_parser.add_argument('-n', '--count', type=int, default=10_000_000, help='ile liczb wypisuje program')
+    arg_parser.add_argument('-r', '--runs', type=int, default=3)
+    arg_parser.add_argument('--llc', default='llc')
+    arg_parser.add_argument('--cxx', default='g++')
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        executables = build(workdir, args.llc, args.cxx, print_program(args.count))
+        best = {}
+        for mode, _ in MODES:
+            output_path = os.path.join(workdir, f'{mode}.out')
+            best[mode] = min(run(executables[mode], output_path) for _ in range(args.runs))
+            print(f"{mode:<12} {best[mode]*1000:10.1f} ms")
+
+        same = filecmp.cmp(os.path.join(workdir, 'buffered.out'), os.path.join(workdir, 'unbuffered.out'), shallow=False)
+        print(f"przyspieszenie {best['unbuffered'] / best['buffered']:.1f}x, wyjście {'identyczne' if same else 'RÓŻNE'}")
@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.LLVM_parser import get_parser
+from src.LLVM_frontend import LatteCompiler
+from src.LLVM_backend import LLVM_QuadCode
+from src.LLVM_ssa import SSABuilder, to_ssa, max_temp_index
+from benchmarks.latte_gen import generate_program
+
+
+def quadruples_of(compiler, code):
+    tree = compiler.parse(code)
+    function_table, annotations = compiler.check(tree)
+    backend = LLVM_QuadCode(function_table, annotations)
+    backend.visit(tree)
+    return backend.get_instructions()
+
+
+def count(quadruples):
+    # Etykiety nie są instrukcjami wykonywanymi, liczymy je osobno
+    kinds = Counter(type(instruction).__name__ for instruction in quadruples)
+    return len(quadruples) - kinds['Label'], kinds
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Przejście do SSA: czas i liczba instrukcji przed/po')
+    arg_parser.add_argument('files', nargs='*', help='pliki .lat; domyślnie wygenerowany program')
+    arg_parser.add_argument('--functions', type=int, default=10)
+    arg_parser.add_argument('--statements', type=int, default=200)
+    args = arg_parser.parse_args()
+
+    compiler = LatteCompiler(parser=get_parser())
+    sources = [(path, open(path).read()) for path in args.files]
+    if not sources:
+        sources = [('wygenerowany', generate_program(args.functions, args.statements))]
+
+    for name, code in sources:
+        quadruples = quadruples_of(compiler, code)
+        before, kinds_before = count(quadruples)
+
+        builder = SSABuilder(max_temp_index(quadruples) + 1)
+        start = time.perf_counter()
+        ssa = to_ssa(quadruples, builder)
+        seconds = time.perf_counter() - start
+        after, kinds_after = count(ssa)
+
+        print(f"{name}: {before} -> {after} instrukcji "
+              f"(Assignment {kinds_before['Assignment']} -> {kinds_after['Assignment']}, "
+              f"phi {kinds_after['Phi']}, usuniętych trywialnych phi {builder.phis_removed})  "
+              f"{seconds*1000:.1f} ms")
@@ -0,0 +1,47 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.LLVM_parser import CACHE_PATH
+
+
+def run_latc(command, filename):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, 'latc.py', command, filename], cwd=ROOT,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def measure(command, filename, runs, cold):
+    times = []
+    for _ in range(runs):
+        if cold and os.path.exists(CACHE_PATH):
+            os.remove(CACHE_PATH)
+        times.append(run_latc(command, filename))
+    return times
+
+
+def report(label, times):
+    print(f"{label:<20} min {min(times)*1000:8.1f} ms   "
+          f"mediana {statistics.median(times)*1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Czas startu latc: zimny (bez cache LALR) vs ciepły')
+    arg_parser.add_argument('file', nargs='?', default='lattests/opt/00empty.lat')
+    arg_parser.add_argument('-n', '--runs', type=int, default=10)
+    args = arg_parser.parse_args()
+
+    print(f"{args.file}, {args.runs} uruchomień\n")
+    for command in ('check', 'compile'):
+        cold = measure(command, args.file, args.runs, cold=True)
+        warm = measure(command, args.file, args.runs, cold=False)
+        report(f"{command} (zimny)", cold)
+        report(f"{command} (ciepły)", warm)
+        print(f"{'przyspieszenie':<20} x{statistics.median(cold) / statistics.median(warm):.2f}\n")
@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lark import Tree
+from src.LLVM_parser import get_parser
+from src.LLVM_frontend import SygnatureAnalyzer, SemanticAnalyzer
+from src.LLVM_backend import LLVM_QuadCode
+from benchmarks.latte_gen import generate_program
+
+
+class LegacyDispatch:
+    # Odtworzenie starego zachowania: słownik metod budowany przy każdym węźle
+    def visit(self, tree):
+        handlers = {data: getattr(self, name) for data, name in self.visit_handlers.items()}
+        if tree.data in handlers:
+            return handlers[tree.data](tree)
+        elif tree.data in self.passthrough_nodes:
+            for child in tree.children:
+                if isinstance(child, Tree):
+                    self.visit(child)
+        else:
+            raise Exception(f"Unhandled node type: {tree.data}")
+
+    def _eval_node(self, tree):
+        handlers = {data: getattr(self, name) for data, name in self.expr_handlers.items()}
+        if tree.data in handlers:
+            return handlers[tree.data](tree)
+        elif tree.data in self.expr_passthrough_nodes:
+            return self._eval_passthrough(tree)
+        else:
+            raise Exception(f"Unsupported expression type: {tree.data}")
+
+
+class LegacySemanticAnalyzer(LegacyDispatch, SemanticAnalyzer):
+    pass
+
+
+class LegacyQuadCode(LegacyDispatch, LLVM_QuadCode):
+    pass
+
+
+def best_time(make_visitor, tree, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        visitor = make_visitor()
+        start = time.perf_counter()
+        visitor.visit(tree)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Węzły/s dla SemanticAnalyzer i LLVM_QuadCode')
+    arg_parser.add_argument('--functions', type=int, default=10)
+    arg_parser.add_argument('--statements', type=int, default=60)
+    arg_parser.add_argument('-r', '--repeats', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    code = generate_program(args.functions, args.statements)
+    tree = get_parser().parse(code)
+    nodes = sum(1 for _ in tree.iter_subtrees())
+
+    SIG_analyzer = SygnatureAnalyzer()
+    SIG_analyzer.visit(tree)
+    function_table = SIG_analyzer.function_table
+    analyzer = SemanticAnalyzer(function_table)
+    analyzer.visit(tree)
+
+    print(f"Program: {len(code.splitlines())} linii, {nodes} węzłów\n")
+    passes = [
+        ('SemanticAnalyzer', LegacySemanticAnalyzer, SemanticAnalyzer),
+        ('LLVM_QuadCode', LegacyQuadCode, LLVM_QuadCode),
+    ]
+    for name, legacy_cls, current_cls in passes:
+        arguments = (function_table,) if current_cls is SemanticAnalyzer else (function_table, analyzer.annotations)
+        before = best_time(lambda: legacy_cls(*arguments), tree, args.repeats)
+        after = best_time(lambda: current_cls(*arguments), tree, args.repeats)
+        print(f"{name:<18} przed {nodes / before:12,.0f} węzłów/s   "
+              f"po {nodes / after:12,.0f} węzłów/s   x{before / after:.2f}")
@@ -0,0 +1,110 @@
+import argparse
+import sys
+import time
+
+
+def load_lat(filepath):
+    with open(filepath, mode='r', encoding='utf-8') as f:
+        return f.read()
+
+
+def check_file(filename):
+    from src.LLVM_frontend import LatteCompiler
+    compiler = LatteCompiler()
+    tree = compiler.parse(load_lat(filename))
+    compiler.check(tree)
+
+
+def open_cache(args):
+    if args.cache_dir is None:
+        return None
+    from src.LLVM_cache import CompilationCache
+    from src.LLVM_frontend import COMPILER_VERSION
+    # Inny próg inlinera daje inny kod, więc nie może trafiać w te same wpisy
+    threshold = getattr(args, 'inline_threshold', None)
+    version = COMPILER_VERSION if threshold is None else f"{COMPILER_VERSION}+inline{threshold}"
+    return CompilationCache(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024, version=version)
+
+
+def compile_file(filename, cache=None, stats=False, inline_threshold=None, inline_report=False, output=None):
+    from src.LLVM_frontend import LatteCompiler
+    compiler = LatteCompiler(cache=cache, inline_threshold=inline_threshold)
+    _, llvm = compiler.compile(load_lat(filename))
+    if stats:
+        for name, value in compiler.stats.items():
+            print(f"{name}: {value}", file=sys.stderr)
+    if inline_report:
+        for call in compiler.inlined:
+            print(f"inline: {call.callee} -> {call.caller} (koszt {call.cost})", file=sys.stderr)
+
+    from src.LLVM_creator import LLVM_Creator
+    LLVM_Creator().write_llvm(llvm, filename, output_path=output)
+
+
+def build_files(args):
+    from src.LLVM_batch import build, format_summary
+    start = time.perf_counter()
+    results = build(args.paths, jobs=args.jobs, output_dir=args.output_dir,
+                    cache_dir=args.cache_dir, cache_size=args.cache_size * 1024 * 1024)
+    wall_time = time.perf_counter() - start
+
+    cache = open_cache(args)
+    print(format_summary(results, wall_time, cache.stats() if cache is not None else None))
+    return 0 if all(result.ok for result in results) else 1
+
+
+def add_cache_arguments(command):
+    command.add_argument('--cache-dir', default=None,
+                         help='katalog cache kompilacji (domyślnie wyłączony)')
+    command.add_argument('--cache-size', type=int, default=256,
+                         help='maksymalny rozmiar cache w MiB')
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='latc', description='Kompilator Latte -> LLVM')
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    check_cmd = commands.add_parser('check', help='tylko analiza składniowa i semantyczna')
+    check_cmd.add_argument('file')
+
+    compile_cmd = commands.add_parser('compile', help='pełna kompilacja do .ll')
+    compile_cmd.add_argument('file')
+    compile_cmd.add_argument('--stats', action='store_true',
+                             help='wypisz, ile czwórek usunęły przebiegi optymalizujące')
+    compile_cmd.add_argument('--inline-threshold', type=int, default=None,
+                             help='maksymalny koszt (liczba czwórek) funkcji wstawianej w miejsce wywołania')
+    compile_cmd.add_argument('--inline-report', action='store_true',
+                             help='wypisz wywołania zastąpione ciałem funkcji')
+    compile_cmd.add_argument('-o', '--output', default=None,
+                             help='ścieżka pliku .ll (domyślnie foo/bar/<nazwa>.ll)')
+    add_cache_arguments(compile_cmd)
+
+    build_cmd = commands.add_parser('build', help='równoległa kompilacja wielu plików .lat')
+    build_cmd.add_argument('paths', nargs='+', help='pliki .lat lub katalogi')
+    build_cmd.add_argument('-j', '--jobs', type=int, default=None,
+                           help='liczba procesów (domyślnie liczba rdzeni)')
+    build_cmd.add_argument('-o', '--output-dir', default='foo/bar')
+    add_cache_arguments(build_cmd)
+
+    args = arg_parser.parse_args(argv)
+
+    if args.command == 'build':
+        return build_files(args)
+
+    try:
+        if args.command == 'check':
+            check_file(args.file)
+        else:
+            compile_file(args.file, open_cache(args), args.stats, args.inline_threshold, args.inline_report,
+                         args.output)
+    except Exception as e:
+        print("ERROR", file=sys.stderr)
+        print(e, file=sys.stderr)
+        return 1
+
+    print("OK", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
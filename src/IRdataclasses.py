@@ -1,98 +1,109 @@
 from dataclasses import dataclass
-from typing import Optional, List, Union
+from typing import Optional, List, Tuple, Union
+from src.IRoperands import Operand, Temp, Var, LabelRef
+
+# Wszystkie rekordy mają slots=True: instrukcje nie mają własnego __dict__,
+# co przy programach z setkami tysięcy czwórek mocno zmniejsza zużycie pamięci
 
 # Podstawowa klasa dla instrukcji i wyrażeń
-@dataclass
+@dataclass(slots=True)
 class Instruction:
     pass
 
 # Wyrażenia
-@dataclass
+@dataclass(slots=True)
 class Expression(Instruction):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOperation(Expression):
-    left: str  # Tymczasowy rejestr lub zmienna
+    left: Operand  # Tymczasowy rejestr, zmienna lub stała
     operator: str
-    right: str
-    result: str  # Tymczasowy wynik (np. "t1")
+    right: Operand
+    result: Operand  # Tymczasowy wynik (np. t1)
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOperation(Expression):
-    operand: str
+    operand: Operand
     operator: str
-    result: str
+    result: Operand
 
-@dataclass
+@dataclass(slots=True)
 class LogicalOperation(Expression):
-    left: str
+    left: Optional[Operand]
     operator: str
-    right: str
-    result: str
+    right: Optional[Operand]
+    result: Operand  # Rejestr wyniku albo etykieta dla 'label', 'goto', 'if_true', 'if_false'
 
-@dataclass
+@dataclass(slots=True)
 class Variable(Expression):
     name: str  # Nazwa zmiennej
 
-@dataclass
+@dataclass(slots=True)
 class Literal(Expression):
     value: str  # Wartość literalu (np. "5" lub "true")
 
 # Instrukcje
-@dataclass
+@dataclass(slots=True)
 class Assignment(Instruction):
-    variable: str  # Nazwa zmiennej
-    value: str  # Wynik wyrażenia
+    variable: Operand  # Zmienna albo rejestr tymczasowy
+    value: Operand  # Wynik wyrażenia
 
-@dataclass
+@dataclass(slots=True)
 class FunctionDefinition(Instruction):
     name: str
-    params: Optional[List[str]]
+    params: Optional[List[Var]]
 
 
-@dataclass 
+@dataclass(slots=True)
 class FunctionCall(Instruction):
     name: str
-    params: List[str]
-    result: Optional[str]
+    params: List[Operand]
+    result: Optional[Temp]
+    tail: Optional[str] = None  # 'tail' albo 'musttail' dla wywołań w pozycji ogonowej
 
 
-@dataclass
+@dataclass(slots=True)
 class EndFunction(Instruction):
     name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Label(Instruction):
-    name: str
+    name: LabelRef
 
 
-@dataclass
+@dataclass(slots=True)
 class ConditionalJump(Instruction):
-    condition: str#??
-    target: str
+    condition: Operand  # Skok do target, gdy warunek jest fałszywy
+    target: LabelRef
 
-@dataclass
+@dataclass(slots=True)
 class Jump(Instruction):
-    target: str
+    target: LabelRef
 
-@dataclass
+@dataclass(slots=True)
 class IFStatement(Instruction):
     condition: str
     then_body: List[Instruction]
     else_body: Optional[List[Instruction]]
 
-@dataclass
+@dataclass(slots=True)
 class WhileStatement(Instruction):
     condition: str
     body: List[Instruction]
 
-@dataclass
+@dataclass(slots=True)
 class ReturnStatement(Instruction):
-    value: Optional[str]  # Zwracana wartość lub None dla "void"
+    value: Optional[Operand]  # Zwracana wartość lub None dla "void"
+
+# Postać SSA: wartość zależna od bloku, z którego przyszło sterowanie
+@dataclass(slots=True)
+class Phi(Instruction):
+    result: Temp
+    incoming: List[Tuple[LabelRef, Operand]]  # (etykieta poprzednika, wartość)
 
 # Program jako lista instrukcji
-@dataclass
+@dataclass(slots=True)
 class Program:
     instructions: List[Instruction]
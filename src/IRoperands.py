@@ -0,0 +1,144 @@
+import ast
+from weakref import WeakValueDictionary
+
+# Operandy kodu czwórkowego. Obiekty są internowane: równe stałe, te same rejestry
+# tymczasowe i te same zmienne to jeden obiekt, więc porównuje się je przez `is`,
+# a rodzaj operandu rozpoznaje po klasie zamiast parsować napisy.
+
+
+class Operand:
+    __slots__ = ('__weakref__',)
+    kind = None
+
+    def __repr__(self):
+        return str(self)
+
+
+class Temp(Operand):
+    __slots__ = ('index', 'type')
+    kind = 'temp'
+    _interned = WeakValueDictionary()
+
+    def __new__(cls, index, type):
+        key = (index, type)
+        temp = cls._interned.get(key)
+        if temp is None:
+            temp = object.__new__(cls)
+            temp.index = index
+            temp.type = type
+            cls._interned[key] = temp
+        return temp
+
+    def __reduce__(self):
+        return (Temp, (self.index, self.type))
+
+    def __str__(self):
+        return f"t{self.index}"
+
+
+class Const(Operand):
+    __slots__ = ('value', 'type')
+    kind = 'const'
+    _interned = WeakValueDictionary()
+
+    def __new__(cls, value, type):
+        key = (type, value)
+        const = cls._interned.get(key)
+        if const is None:
+            const = object.__new__(cls)
+            const.value = value
+            const.type = type
+            cls._interned[key] = const
+        return const
+
+    @classmethod
+    def from_literal(cls, token):
+        # Literał z kodu źródłowego, np. "a\n" w cudzysłowach i z sekwencjami ucieczki
+        return cls(ast.literal_eval(token), 'string')
+
+    def __reduce__(self):
+        return (Const, (self.value, self.type))
+
+    def __str__(self):
+        if self.type == 'boolean':
+            return 'true' if self.value else 'false'
+        if self.type == 'string':
+            escaped = (self.value.replace('\\', '\\\\').replace('"', '\\"')
+                       .replace('\n', '\\n').replace('\t', '\\t'))
+            return f'"{escaped}"'
+        return str(self.value)
+
+
+class Var(Operand):
+    __slots__ = ('symbol',)
+    kind = 'var'
+    _interned = WeakValueDictionary()
+
+    def __new__(cls, symbol):
+        var = cls._interned.get(symbol)
+        if var is None:
+            var = object.__new__(cls)
+            var.symbol = symbol
+            cls._interned[symbol] = var
+        return var
+
+    @property
+    def type(self):
+        return self.symbol.type
+
+    def __reduce__(self):
+        return (Var, (self.symbol,))
+
+    def __str__(self):
+        return self.symbol.unique
+
+
+class Undef(Operand):
+    # Wartość nieokreślona (undef w LLVM), np. wynik wstawionej funkcji na ścieżce,
+    # która nie kończy się return, więc w poprawnym programie nigdy nie jest wykonywana
+    __slots__ = ('type',)
+    kind = 'undef'
+    _interned = WeakValueDictionary()
+
+    def __new__(cls, type):
+        undef = cls._interned.get(type)
+        if undef is None:
+            undef = object.__new__(cls)
+            undef.type = type
+            cls._interned[type] = undef
+        return undef
+
+    def __reduce__(self):
+        return (Undef, (self.type,))
+
+    def __str__(self):
+        return 'undef'
+
+
+class LabelRef(Operand):
+    __slots__ = ('name',)
+    kind = 'label'
+    type = None
+    _interned = WeakValueDictionary()
+
+    def __new__(cls, name):
+        label = cls._interned.get(name)
+        if label is None:
+            label = object.__new__(cls)
+            label.name = name
+            cls._interned[name] = label
+        return label
+
+    def __reduce__(self):
+        return (LabelRef, (self.name,))
+
+    def __str__(self):
+        return self.name
+
+
+# Znaczniki początku i końca bloku {...}; nie są celami skoków
+BLOCK_START = LabelRef('block_start')
+BLOCK_END = LabelRef('block_end')
+
+TRUE = Const(True, 'boolean')
+FALSE = Const(False, 'boolean')
@@ -1,61 +1,71 @@
 from lark.visitors import Visitor
 from lark import Tree, Token
 from src.IRdataclasses import *
-from src.LLVM_frontend import FunctionCallAnalyzer
-
-
-class ScopeHandler:
-    def __init__(self):
-        self.symbol_table_stack = [{}]
-        self.temp_types = {} # Na typy rejestrów żeby pamiętać o nich
-        self.block_counter = 0
-
-    def enter_block(self):
-        self.symbol_table_stack.append({})
-        self.block_counter += 1
-
-    def exit_block(self):
-        if len(self.symbol_table_stack) > 1:
-            self.symbol_table_stack.pop()
-        else:
-            raise Exception("Attempted to exit global scope")
-
-    def declare_variable(self, var_name, var_type, value_tree=None):
-        current_scope = self.symbol_table_stack[-1]
-
-        if var_name in current_scope:
-            raise Exception(f"Variable {var_name} already declared in this scope")
-        
-        unique_name = f"{var_name}_block{self.block_counter}"
-        current_scope[unique_name] = var_type
-        return unique_name
-
-    def get_variable_type(self, var_name):    
-        if var_name.startswith('"') and var_name.endswith('"'):
-            return 'string'
-        if var_name.isdigit():
-            return 'int'
-
-        # Obsługa rejestrów tymczasowych
-        if var_name in self.temp_types:
-            return self.temp_types[var_name]
-        try:
-            for scope in reversed(self.symbol_table_stack):
-                if var_name in scope:
-                    return scope[var_name]
-        except:
-            raise Exception(f"Variable '{var_name}' not declared")
-        
-
-    def set_temp_type(self, temp, var_type):
-        self.temp_types[temp] = var_type
-
-    def reset(self):
-        self.symbol_table_stack = [{}]
-
-
-class LLVM_QuadCode(Visitor):
-    def __init__(self, function_table):
+from src.LLVM_visitor import DispatchVisitor
+from src.IRoperands import Temp, Const, Var, LabelRef, BLOCK_START, BLOCK_END, TRUE, FALSE
+
+
+class LLVM_QuadCode(DispatchVisitor):
+    visit_handlers = {
+        'topdef': 'topdef',
+        'ret_stmt': 'ret_stmt',
+        'vret_stmt': 'vret_stmt',
+        'if_stmt': 'if_stmt',
+        'if_else_stmt': 'if_else_stmt',
+        'decr_stmt': 'decr_stmt',
+        'incr_stmt': 'incr_stmt',
+        'while_stmt': 'while_stmt',
+        'decl_stmt': 'decl_stmt',
+        'assign_stmt': 'assign_stmt',
+        'block': 'block',
+        'int_expr': 'eval_expr',
+        'boolean_expr': 'eval_expr',
+        'true_expr': 'eval_expr',
+        'false_expr': 'eval_expr',
+        'string_expr': 'eval_expr',
+        'var_expr': 'eval_expr',
+        'add_expr': 'eval_expr',
+        'sub_expr': 'eval_expr',
+        'and_expr': 'eval_expr',
+        'or_expr': 'eval_expr',
+        'not_expr': 'eval_expr',
+        'mul_expr': 'eval_expr',
+        'div_expr': 'eval_expr',
+        'rel_expr': 'eval_expr',
+        'paren_expr': 'eval_expr',
+        'func_call_expr': 'eval_expr',
+        'neg_expr': 'eval_expr',
+    }
+
+    expr_handlers = {
+        'int_expr': 'eval_int_expr',
+        'boolean_expr': 'eval_boolean_expr',
+        'string_expr': 'eval_string_expr',
+        'true_expr': 'eval_boolean_literal',
+        'false_expr': 'eval_boolean_literal',
+        'var_expr': 'eval_var_expr',
+
+        'add_expr': 'Binary_expr',
+        'sub_expr': 'Binary_expr',
+        'mul_expr': 'Binary_expr',
+        'div_expr': 'Binary_expr',
+
+        'and_expr': 'Logical_expr',
+        'or_expr': 'Logical_expr',
+
+        'not_expr': 'Unary_expr',
+        'neg_expr': 'Unary_expr',
+
+        'rel_expr': 'eval_rel_expr',
+        'paren_expr': 'eval_paren_expr',
+        'func_call_expr': 'func_call_expr',
+    }
+
+    # Węzły, które wymagają odwiedzenia poddrzew
+    passthrough_nodes = frozenset({'start', 'program', 'stmt', 'item', 'item_list', 'stmt_list', 'expr_list', 'expr_stmt'})
+    expr_passthrough_nodes = passthrough_nodes
+
+    def __init__(self, function_table, annotations):
         self.instructions = []
         self.quadruples = []
 
@@ -67,123 +77,41 @@ class LLVM_QuadCode(Visitor):
         self.last_register = None
 
         self.function_table = function_table
-        self.scope_handler = ScopeHandler()
-        self.function_call_analyzer = FunctionCallAnalyzer(self.function_table, self.scope_handler)
+        # Typy wyrażeń i symbole zmiennych wyznaczone przez SemanticAnalyzer
+        self.annotations = annotations
+        self.expr_folded = annotations.folded
         self.current_function = (None, False)
 
-    def new_temp(self) -> str:
+    def new_temp(self, var_type) -> Temp:
         self.temp_counter += 1
-        return f"t{self.temp_counter}"
+        return Temp(self.temp_counter, var_type)
 
     def new_label(self):
         self.label_counter += 1
-        return f"L{self.label_counter}"
-
-    def visit(self, tree):
-        handlers = {
-            'topdef': self.topdef,
-            'ret_stmt': self.ret_stmt,
-            'vret_stmt': self.vret_stmt,
-            'if_stmt': self.if_stmt,
-            'if_else_stmt': self.if_else_stmt,
-            'decr_stmt': self.decr_stmt,
-            'incr_stmt': self.incr_stmt,
-            'while_stmt': self.while_stmt,
-            'decl_stmt':self.decl_stmt,
-            'block':self.block,
-            'int_expr': self.eval_expr,
-            'boolean_expr': self.eval_expr,
-            'true_expr': self.eval_expr,
-            'false_expr': self.eval_expr,
-            'string_expr': self.eval_expr,
-            'var_expr': self.eval_expr,
-            'add_expr': self.eval_expr,
-            'sub_expr': self.eval_expr,
-            'and_expr': self.eval_expr,
-            'or_expr': self.eval_expr,
-            'not_expr': self.eval_expr,
-            'mul_expr': self.eval_expr,
-            'div_expr': self.eval_expr,
-            'rel_expr': self.eval_expr,
-            'paren_expr': self.eval_expr,
-            'func_call_expr': self.eval_expr,
-            'neg_expr': self.eval_expr,
-        }
-
-
-        # Węzły, które wymagają odwiedzenia poddrzew
-        self.passthrough_nodes = {'start', 'program', 'stmt', 'item', 'item_list', 'stmt_list', 'expr_list', 'expr_stmt'}
-
-        if tree.data in handlers:
-            return handlers[tree.data](tree)
+        return LabelRef(f"L{self.label_counter}")
 
-        elif tree.data in self.passthrough_nodes:
-            for child in tree.children:
-                if isinstance(child, Tree):
-                    self.visit(child)
-
-        else:
-            raise Exception(f"Unhandled node type: {tree.data}")
-
-    def eval_expr(self, tree):
-        handlers = {
-            'int_expr': self.eval_int_expr,
-            'boolean_expr': self.eval_boolean_expr,
-            'string_expr':self.eval_string_expr,
-            'true_expr': self.eval_boolean_literal,
-            'false_expr': self.eval_boolean_literal,
-            'var_expr': self.eval_var_expr,
-
-            'add_expr': self.Binary_expr,
-            'sub_expr': self.Binary_expr,
-            'mul_expr': self.Binary_expr,
-            'div_expr': self.Binary_expr,
-
-            'and_expr': self.Logical_expr,
-            'or_expr': self.Logical_expr,
-
-            'not_expr': self.Unary_expr,
-            'neg_expr': self.Unary_expr,
-
-            'rel_expr': self.eval_rel_expr,
-            'paren_expr': self.eval_paren_expr,
-            'func_call_expr': self.func_call_expr,
-        }
-
-        if tree.data in handlers:
-            return handlers[tree.data](tree)
-
-        elif tree.data in self.passthrough_nodes:
-            for child in tree.children:
-                if isinstance(child, Tree):
-                    return self.eval_expr(child)  
-
-        else:
-            raise Exception(f"Unsupported expression type: {tree.data}")
-     
     def eval_int_expr(self, tree):
         value = tree.children[0].value
-        return value
+        return Const(int(value), 'int')
 
     def eval_boolean_expr(self, tree): # To nie jest w ogóle teraz używane?
         value = tree.children[0].value
-        return value
+        return Const(value == 'true', 'boolean')
 
     def eval_boolean_literal(self, tree):
         if tree.data == 'true_expr':
-            return 'true'
+            return TRUE
         elif tree.data == 'false_expr':
-            return 'false'
+            return FALSE
         else:
             raise Exception(f"Nieznany węzeł logiczny: {tree.data}")
 
     def eval_string_expr(self, tree):
         value = tree.children[0].value
-        return value
+        return Const.from_literal(value)
 
     def eval_var_expr(self, tree):
-        var_name = tree.children[0].value
-        return var_name  
+        return Var(self.annotations.symbols[id(tree)])
 
     def eval_add_expr(self, tree):
         return self.Binary_expr(tree)
@@ -193,22 +121,18 @@ class LLVM_QuadCode(Visitor):
         operator = tree.children[1].data
         right_tree = tree.children[2]
 
-        left_result = self.eval_expr(left_tree)
-        right_result = self.eval_expr(right_tree)
+        left_result = yield left_tree
+        right_result = yield right_tree
 
-        left_type = self.scope_handler.get_variable_type(left_result)
-        right_type = self.scope_handler.get_variable_type(right_result)
-      
+        result_type = self.annotations.types[id(tree)]
+        result = self.new_temp(result_type)
 
-        result = self.new_temp()
-
-        if operator == 'plus_op' and left_type == 'string' and right_type == 'string':
+        if result_type == 'string':
             self.quadruples.append(FunctionCall(
                 name='Concat',
                 params=[left_result, right_result],
                 result=result
             ))
-            self.scope_handler.set_temp_type(result, 'string')
 
         else:
             self.quadruples.append(BinaryOperation(
@@ -217,7 +141,6 @@ class LLVM_QuadCode(Visitor):
                 right=right_result,
                 result=result
             ))
-            self.scope_handler.set_temp_type(result, 'int')
 
         return result
 
@@ -225,8 +148,8 @@ class LLVM_QuadCode(Visitor):
         left_tree = tree.children[0]
         right_tree = tree.children[1]
 
-        left_result = self.eval_expr(left_tree)
-        result = self.new_temp()
+        left_result = yield left_tree
+        result = self.new_temp('boolean')
 
         false_label = self.new_label()
         end_label = self.new_label()
@@ -242,6 +165,14 @@ class LLVM_QuadCode(Visitor):
                     result=false_label
                 )
             )
+            # Ewaluacja prawego operandu, jego wartość jest wynikiem
+            right_result = yield right_tree
+            self.quadruples.append(
+                Assignment(
+                    variable=result,
+                    value=right_result
+                )
+            )
             # Skok na koniec wyrażenia
             self.quadruples.append(
                 LogicalOperation(
@@ -263,7 +194,7 @@ class LLVM_QuadCode(Visitor):
             self.quadruples.append(
                 Assignment(
                     variable=result,
-                    value='false'
+                    value=FALSE
                 )
             )
             self.quadruples.append(
@@ -289,7 +220,7 @@ class LLVM_QuadCode(Visitor):
                 )
             )
             # Ewaluacja prawego operand
-            right_result = self.eval_expr(right_tree)
+            right_result = yield right_tree
             self.quadruples.append(
                 Assignment(
                     variable=result,
@@ -306,10 +237,18 @@ class LLVM_QuadCode(Visitor):
                 )
             )
             # Jeśli lewy operand jest true -> t1=true
+            self.quadruples.append(
+                LogicalOperation(
+                    left=None,
+                    operator='label',
+                    right=None,
+                    result=true_label
+                )
+            )
             self.quadruples.append(
                 Assignment(
                     variable=result,
-                    value='true'
+                    value=TRUE
                 )
             )
             self.quadruples.append(
@@ -325,8 +264,8 @@ class LLVM_QuadCode(Visitor):
 
     def Unary_expr(self, tree):
         expr = tree.children[0]
-        operand = self.eval_expr(expr)
-        result = self.new_temp()
+        operand = yield expr
+        result = self.new_temp('boolean' if tree.data == 'not_expr' else 'int')
 
         if tree.data == 'not_expr':
             self.quadruples.append(UnaryOperation(
@@ -348,14 +287,13 @@ class LLVM_QuadCode(Visitor):
         items = tree.children[1].children  
 
         default_values = {
-            'int_type': '0',
-            'boolean_type': 'false',
-            'string_type': '""'
+            'int_type': Const(0, 'int'),
+            'boolean_type': FALSE,
+            'string_type': Const('', 'string')
         }
 
         for item in items:
             var_name = item.children[0].value
-            self.scope_handler.declare_variable(var_name, var_type.replace("_type", ""))
 
             if len(item.children) > 1:
                 expr = item.children[1]
@@ -363,10 +301,8 @@ class LLVM_QuadCode(Visitor):
             else:
                 value = default_values[var_type]
 
-            unique_var_name = self.scope_handler.declare_variable(var_name, var_type)
-
             self.quadruples.append(Assignment(
-                variable=unique_var_name,
+                variable=Var(self.annotations.symbols[id(item)]),
                 value=value
             ))
      
@@ -380,10 +316,10 @@ class LLVM_QuadCode(Visitor):
         return self.Unary_expr(tree)
 
     def eval_rel_expr(self, tree):
-        left = self.eval_expr(tree.children[0])  
+        left = yield tree.children[0]
         operator = tree.children[1].data             # <, >, ==, !=
-        right = self.eval_expr(tree.children[2])  
-        result = self.new_temp()
+        right = yield tree.children[2]
+        result = self.new_temp('boolean')
 
         self.quadruples.append(LogicalOperation(
             left=left,
@@ -395,68 +331,61 @@ class LLVM_QuadCode(Visitor):
         return result
 
     def eval_paren_expr(self, tree):
-        return self.eval_expr(tree.children[0])
+        return (yield tree.children[0])
 
     def func_call_expr(self, tree):
-        result = self.new_temp()
-
         func_name = tree.children[0].value
-        args = [self.eval_expr(arg) for arg in tree.children[1].children]
-
-        if func_name in {'printInt', 'printString', 'error'}:
-            self.quadruples.append(FunctionCall(
-                name=func_name,
-                params=args,
-                result=None
-            ))
-        else:
-            result = self.new_temp()
-            self.quadruples.append(FunctionCall(
-                name=func_name,
-                params=args,
-                result=result
-            ))
+        arg_trees = tree.children[1].children if tree.children[1] is not None else []
+        args = []
+        for arg in arg_trees:
+            args.append((yield arg))
 
+        # Funkcje void nie mają rejestru wyniku
         ret_type = self.function_table[func_name]['return_type']
-        self.scope_handler.set_temp_type(result, ret_type)
+        result = self.new_temp(ret_type) if ret_type != 'void' else None
+        self.quadruples.append(FunctionCall(
+            name=func_name,
+            params=args,
+            result=result
+        ))
+
         return result
 
     def block(self, tree):
-        self.scope_handler.enter_block()
-        self.quadruples.append(Label(name='block_start'))
+        self.quadruples.append(Label(name=BLOCK_START))
         for stmt in tree.children:  
             self.visit(stmt) 
-        self.quadruples.append(Label(name='block_end'))
-        self.scope_handler.exit_block()
+        self.quadruples.append(Label(name=BLOCK_END))
 
     def decl_stmt(self, tree):       
         return self.Declaration_expr(tree)
 
-    def variable(self, tree):
-        var_name = tree.children[0].value
-        var_type = self.scope_handler.get_variable_type(var_name)
-     
-    def decr_stmt(self, tree):
-        var_name = tree.children[0].value
-        var_type = self.scope_handler.get_variable_type(var_name)
-        
-    def incr_stmt(self, tree):
-        var_name = tree.children[0].value
-        var_type = self.scope_handler.get_variable_type(var_name)
-         
-    def neg_expr(self, tree):
-        expr = tree.children[0]
-        expr_type = self.eval_expr(expr)
+    def assign_stmt(self, tree):
+        value = self.eval_expr(tree.children[1])
+        self.quadruples.append(Assignment(
+            variable=Var(self.annotations.symbols[id(tree)]),
+            value=value
+        ))
 
-        return 'int'
+    def Step_stmt(self, tree, operator):
+        variable = Var(self.annotations.symbols[id(tree)])
+        result = self.new_temp('int')
+        self.quadruples.append(BinaryOperation(
+            left=variable,
+            operator=operator,
+            right=Const(1, 'int'),
+            result=result
+        ))
+        self.quadruples.append(Assignment(
+            variable=variable,
+            value=result
+        ))
 
-    def var_decl_with_expr(self, tree):
-        var_type = tree.children[0]
-        var_name = tree.children[1].value
-        expr = tree.children[2]
-        expr_type = self.eval_expr(expr)
+    def decr_stmt(self, tree):
+        self.Step_stmt(tree, 'minus_op')
 
-        self.scope_handler.declare_variable(var_name, var_type)
+    def incr_stmt(self, tree):
+        self.Step_stmt(tree, 'plus_op')
 
     def topdef(self, tree):
         func_name = tree.children[1].value
@@ -472,21 +401,17 @@ class LLVM_QuadCode(Visitor):
                 'params': params
             }
 
+        # Parametry pod unikalnymi nazwami nadanymi przez analizę semantyczną
+        param_symbols = self.annotations.symbols[id(tree)]
         self.quadruples.append(FunctionDefinition(
         name=func_name,
-        params=params
+        params=[Var(symbol) for symbol in param_symbols]
         ))
 
 
-        self.scope_handler.enter_block()
-
-        for param_type, param_name in params:
-            self.scope_handler.declare_variable(param_name, param_type)
-
         self.visit(block)
         self.quadruples.append(EndFunction(name=func_name))
 
-        self.scope_handler.exit_block()
         self.current_function = (None, False)
 
     def ret_stmt(self, tree):
@@ -0,0 +1,119 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from src.LLVM_frontend import LatteCompiler
+from src.LLVM_creator import LLVM_Creator
+from src.LLVM_cache import CompilationCache, DEFAULT_MAX_BYTES
+
+
+@dataclass
+class BuildResult:
+    filename: str
+    output: Optional[str]
+    error: Optional[str]
+    seconds: float
+    cached: bool = False
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+# Każdy proces roboczy buduje parser raz i używa go dla wszystkich swoich plików
+_compiler = None
+
+
+def _init_worker(cache_dir=None, cache_size=DEFAULT_MAX_BYTES):
+    global _compiler
+    cache = CompilationCache(cache_dir, max_bytes=cache_size) if cache_dir is not None else None
+    _compiler = LatteCompiler(cache=cache)
+
+
+def compile_one(filename, output_dir):
+    if _compiler is None:
+        _init_worker()
+
+    cache = _compiler.cache
+    hits_before = cache.hits if cache is not None else 0
+
+    start = time.perf_counter()
+    try:
+        with open(filename, mode='r', encoding='utf-8') as f:
+            code = f.read()
+        _, llvm = _compiler.compile(code)
+        output = LLVM_Creator().write_llvm(llvm, filename, output_dir)
+        error = None
+    except Exception as e:
+        output = None
+        error = f"{type(e).__name__}: {e}".strip()
+
+    cached = cache is not None and cache.hits > hits_before
+    return BuildResult(filename, output, error, time.perf_counter() - start, cached)
+
+
+def _compile_job(job):
+    return compile_one(*job)
+
+
+def find_sources(paths):
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                sources.extend((os.path.join(dirpath, name), path)
+                               for name in sorted(filenames) if name.endswith('.lat'))
+        else:
+            sources.append((path, os.path.dirname(path)))
+    return sources
+
+
+def build(paths, jobs=None, output_dir='foo/bar', cache_dir=None, cache_size=DEFAULT_MAX_BYTES):
+    # Ścieżki wyjściowe odwzorowują podkatalogi wejścia, żeby pliki o tej samej nazwie się nie nadpisywały
+    job_list = []
+    for filename, root in find_sources(paths):
+        relative_dir = os.path.relpath(os.path.dirname(filename), root) if root else '.'
+        job_list.append((filename, os.path.normpath(os.path.join(output_dir, relative_dir))))
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(job_list)))
+
+    if jobs == 1:
+        _init_worker(cache_dir, cache_size)
+        return [_compile_job(job) for job in job_list]
+
+    chunksize = max(1, len(job_list) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(cache_dir, cache_size)) as executor:
+        return list(executor.map(_compile_job, job_list, chunksize=chunksize))
+
+
+def format_summary(results, wall_time, cache_stats=None):
+    lines = []
+    for result in results:
+        status = "OK  " if result.ok else "FAIL"
+        source = " (cache)" if result.cached else ""
+        lines.append(f"{status} {result.seconds*1000:9.2f} ms  {result.filename}{source}")
+
+    failures = [result for result in results if not result.ok]
+    if failures:
+        lines.append("")
+        lines.append(f"Błędy ({len(failures)}):")
+        for result in failures:
+            lines.append(f"  {result.filename}: {result.error}")
+
+    total = sum(result.seconds for result in results)
+    throughput = len(results) / wall_time if wall_time > 0 else 0.0
+    lines.append("")
+    lines.append(f"Plików: {len(results)}, poprawnych: {len(results) - len(failures)}, "
+                 f"błędnych: {len(failures)}")
+    lines.append(f"Czas: {wall_time:.2f} s (suma po plikach {total:.2f} s), {throughput:.1f} plików/s")
+    if cache_stats is not None:
+        hits = sum(result.cached for result in results)
+        lines.append(f"Cache: {hits} trafień, {len(results) - hits} chybień, "
+                     f"{cache_stats['entries']} wpisów, {cache_stats['bytes'] / 1024:.1f} KiB")
+    return "\n".join(lines)
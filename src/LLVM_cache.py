@@ -0,0 +1,141 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+from src.LLVM_frontend import COMPILER_VERSION
+from src.LLVM_parser import load_grammar
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class CompilationCache:
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, grammar=None, version=COMPILER_VERSION):
+        if grammar is None:
+            grammar = load_grammar()
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = None  # Liczone leniwie przy pierwszym zapisie
+
+        # Gramatyka i wersja kompilatora są wspólne dla wszystkich wpisów
+        self.prefix = hashlib.sha256(
+            f"{version}\0{len(grammar)}\0{grammar}\0".encode('utf-8')
+        ).digest()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, code):
+        return hashlib.sha256(self.prefix + code.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.pickle')
+
+    def get(self, code):
+        path = self.path(self.key(code))
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # Uszkodzony wpis traktujemy jak brak i usuwamy
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        # Czas modyfikacji służy jako znacznik ostatniego użycia dla LRU. Wpis mógł
+        # już zniknąć przez równoległe usuwanie, ale wczytany wynik jest poprawny
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return entry['quadruples'], entry['llvm']
+
+    def put(self, code, quadruples, llvm):
+        path = self.path(self.key(code))
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        data = pickle.dumps({'quadruples': quadruples, 'llvm': llvm}, protocol=pickle.HIGHEST_PROTOCOL)
+
+        # Nadpisywany wpis przestaje zajmować miejsce
+        try:
+            replaced = os.stat(path).st_size
+        except FileNotFoundError:
+            replaced = 0
+
+        # Zapis do pliku tymczasowego i os.replace, żeby równoległe buildy nigdy
+        # nie zobaczyły niepełnego wpisu
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += len(data) - replaced
+
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_bytes=None):
+        if target_bytes is None:
+            target_bytes = self.max_bytes * 9 // 10
+
+        # Najdawniej używane wpisy idą pierwsze
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        size = sum(size for _, size, _ in entries)
+        for path, entry_size, _ in entries:
+            if size <= target_bytes:
+                break
+            if self._remove(path):
+                self.evictions += 1
+            size -= entry_size
+        self._size = size
+
+    def clear(self):
+        for path, _, _ in self._entries():
+            self._remove(path)
+        self._size = 0
+
+    def stats(self):
+        entries = list(self._entries())
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+        }
+
+    def _entries(self):
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for name in filenames:
+                if not name.endswith('.pickle'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
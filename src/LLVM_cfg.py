@@ -0,0 +1,277 @@
+from dataclasses import dataclass, field
+from typing import List
+
+from src.IRdataclasses import *
+from src.IRoperands import LabelRef, BLOCK_START, BLOCK_END
+
+# Blok wejściowy zawsze nazywa się tak samo, więc po flatten() i ponownym
+# zbudowaniu grafu odwołania do niego (np. w phi) pozostają ważne
+ENTRY = LabelRef('entry')
+CONTROL_OPERATORS = ('label', 'goto', 'if_true', 'if_false')
+
+
+@dataclass(slots=True)
+class BasicBlock:
+    index: int
+    label: LabelRef
+    instructions: List[Instruction] = field(default_factory=list)
+
+    def terminator(self):
+        if self.instructions and is_terminator(self.instructions[-1]):
+            return self.instructions[-1]
+        return None
+
+
+@dataclass
+class FunctionCFG:
+    definition: FunctionDefinition
+    blocks: List[BasicBlock]
+    # Listy sąsiedztwa: succ[i] i pred[i] to indeksy bloków
+    succ: List[List[int]] = field(default_factory=list)
+    pred: List[List[int]] = field(default_factory=list)
+    label_counter: int = 0
+
+    @property
+    def name(self):
+        return self.definition.name
+
+    def new_label(self):
+        self.label_counter += 1
+        return LabelRef(f"B{self.label_counter}")
+
+    def new_block(self, instructions=None):
+        block = BasicBlock(len(self.blocks), self.new_label(), instructions or [])
+        self.blocks.append(block)
+        return block
+
+    def remove_unreachable(self):
+        reachable = [False] * len(self.blocks)
+        reachable[0] = True
+        stack = [0]
+        while stack:
+            index = stack.pop()
+            for successor in self.succ[index]:
+                if not reachable[successor]:
+                    reachable[successor] = True
+                    stack.append(successor)
+
+        removed = len(self.blocks) - sum(reachable)
+        if removed:
+            self.blocks = [block for block in self.blocks if reachable[block.index]]
+            self.compute_edges()
+        return removed
+
+    def block_index(self):
+        return {block.label: block.index for block in self.blocks}
+
+    def compute_edges(self):
+        # Po zmianach w blokach (usuwanie, wstawianie) indeksy i krawędzie liczymy od nowa
+        for index, block in enumerate(self.blocks):
+            block.index = index
+        by_label = self.block_index()
+
+        count = len(self.blocks)
+        self.succ = [[] for _ in range(count)]
+        self.pred = [[] for _ in range(count)]
+        for block in self.blocks:
+            last = block.instructions[-1] if block.instructions else None
+            targets = [by_label[target] for target in branch_targets(last)] if last is not None else []
+            if falls_through(last) and block.index + 1 < count:
+                targets.append(block.index + 1)
+
+            for target in targets:
+                if target not in self.succ[block.index]:
+                    self.succ[block.index].append(target)
+                    self.pred[target].append(block.index)
+
+    def instructions(self):
+        result = [self.definition]
+        for block in self.blocks:
+            # Do bloku wejściowego nikt nie skacze, więc nie potrzebuje etykiety
+            if block.index > 0:
+                result.append(Label(name=block.label))
+            result.extend(block.instructions)
+        result.append(EndFunction(name=self.definition.name))
+        return result
+
+    def instruction_count(self):
+        return sum(len(block.instructions) for block in self.blocks)
+
+
+def jump_target(instruction):
+    if isinstance(instruction, Jump):
+        return instruction.target
+    if isinstance(instruction, LogicalOperation) and instruction.operator == 'goto':
+        return instruction.result
+    return None
+
+
+def conditional_jump(instruction):
+    # (warunek, cel, skok_gdy) albo None; ConditionalJump skacze, gdy warunek jest fałszywy
+    if isinstance(instruction, ConditionalJump):
+        return instruction.condition, instruction.target, False
+    if isinstance(instruction, LogicalOperation):
+        if instruction.operator == 'if_false':
+            return instruction.left, instruction.result, False
+        if instruction.operator == 'if_true':
+            return instruction.left, instruction.result, True
+    return None
+
+
+def label_name(instruction):
+    if isinstance(instruction, Label):
+        if instruction.name is BLOCK_START or instruction.name is BLOCK_END:
+            return None
+        return instruction.name
+    if isinstance(instruction, LogicalOperation) and instruction.operator == 'label':
+        return instruction.result
+    return None
+
+
+def branch_targets(instruction):
+    target = jump_target(instruction)
+    if target is not None:
+        return (target,)
+    conditional = conditional_jump(instruction)
+    if conditional is not None:
+        return (conditional[1],)
+    return ()
+
+
+def is_terminator(instruction):
+    return (isinstance(instruction, ReturnStatement)
+            or jump_target(instruction) is not None
+            or conditional_jump(instruction) is not None)
+
+
+def falls_through(instruction):
+    if instruction is None:
+        return True
+    return not isinstance(instruction, ReturnStatement) and jump_target(instruction) is None
+
+
+def synthetic_index(label):
+    name = label.name
+    if name.startswith('B') and name[1:].isdigit():
+        return int(name[1:])
+    return 0
+
+
+def build_function_cfg(definition, body):
+    # Nowe etykiety B<n> nie mogą zderzyć się z tymi, które zostały po poprzednim flatten()
+    counter = max((synthetic_index(label) for label in map(label_name, body) if label is not None), default=0)
+    cfg = FunctionCFG(definition, [], label_counter=counter)
+    current = BasicBlock(0, ENTRY)
+    cfg.blocks.append(current)
+    named = False
+
+    for instruction in body:
+        label = label_name(instruction)
+        if label is not None:
+            # Etykieta zaczyna nowy blok, chyba że obecny jest pusty i jeszcze nienazwany.
+            # Blok wejściowy zostaje bez poprzedników, nawet gdy funkcja zaczyna się od pętli
+            if current.instructions or named or current.index == 0:
+                current = BasicBlock(len(cfg.blocks), label)
+                cfg.blocks.append(current)
+            else:
+                current.label = label
+            named = True
+            continue
+
+        if isinstance(instruction, LogicalOperation) and instruction.operator == 'goto':
+            instruction = Jump(target=instruction.result)
+
+        current.instructions.append(instruction)
+        if is_terminator(instruction):
+            current = cfg.new_block()
+            named = False
+
+    # Pusty blok po ostatnim skoku zostaje tylko wtedy, gdy ktoś do niego skacze
+    if not current.instructions and not named and current.index > 0:
+        cfg.blocks.pop()
+
+    cfg.compute_edges()
+    return cfg
+
+
+def instruction_uses(instruction):
+    if isinstance(instruction, BinaryOperation):
+        return (instruction.left, instruction.right)
+    if isinstance(instruction, UnaryOperation):
+        return (instruction.operand,)
+    if isinstance(instruction, LogicalOperation):
+        if instruction.operator in ('if_true', 'if_false'):
+            return (instruction.left,)
+        if instruction.operator in CONTROL_OPERATORS:
+            return ()
+        return (instruction.left, instruction.right)
+    if isinstance(instruction, Assignment):
+        return (instruction.value,)
+    if isinstance(instruction, FunctionCall):
+        return tuple(instruction.params)
+    if isinstance(instruction, ConditionalJump):
+        return (instruction.condition,)
+    if isinstance(instruction, ReturnStatement):
+        return () if instruction.value is None else (instruction.value,)
+    if isinstance(instruction, Phi):
+        return tuple(value for _, value in instruction.incoming)
+    return ()
+
+
+def instruction_def(instruction):
+    if isinstance(instruction, (BinaryOperation, UnaryOperation, FunctionCall, Phi)):
+        return instruction.result
+    if isinstance(instruction, LogicalOperation) and instruction.operator not in CONTROL_OPERATORS:
+        return instruction.result
+    if isinstance(instruction, Assignment):
+        return instruction.variable
+    return None
+
+
+def rewrite_uses(instruction, replace):
+    # replace: operand -> operand; podmienia operandy czytane przez instrukcję w miejscu
+    if isinstance(instruction, BinaryOperation):
+        instruction.left = replace(instruction.left)
+        instruction.right = replace(instruction.right)
+    elif isinstance(instruction, UnaryOperation):
+        instruction.operand = replace(instruction.operand)
+    elif isinstance(instruction, LogicalOperation):
+        if instruction.operator in ('if_true', 'if_false'):
+            instruction.left = replace(instruction.left)
+        elif instruction.operator not in CONTROL_OPERATORS:
+            instruction.left = replace(instruction.left)
+            instruction.right = replace(instruction.right)
+    elif isinstance(instruction, Assignment):
+        instruction.value = replace(instruction.value)
+    elif isinstance(instruction, FunctionCall):
+        instruction.params = [replace(param) for param in instruction.params]
+    elif isinstance(instruction, ConditionalJump):
+        instruction.condition = replace(instruction.condition)
+    elif isinstance(instruction, ReturnStatement):
+        if instruction.value is not None:
+            instruction.value = replace(instruction.value)
+    elif isinstance(instruction, Phi):
+        instruction.incoming = [(label, replace(value)) for label, value in instruction.incoming]
+
+
+def build_cfg(quadruples):
+    functions = []
+    definition = None
+    body = []
+    for instruction in quadruples:
+        if isinstance(instruction, FunctionDefinition):
+            definition = instruction
+            body = []
+        elif isinstance(instruction, EndFunction):
+            functions.append(build_function_cfg(definition, body))
+            definition = None
+        elif definition is not None:
+            body.append(instruction)
+    return functions
+
+
+def flatten(functions):
+    quadruples = []
+    for cfg in functions:
+        quadruples.extend(cfg.instructions())
+    return quadruples
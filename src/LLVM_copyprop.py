@@ -0,0 +1,152 @@
+from src.IRdataclasses import *
+from src.IRoperands import Const, Temp, Var
+from src.LLVM_cfg import instruction_uses, instruction_def, rewrite_uses
+from src.LLVM_ssa import reverse_postorder
+
+# Propagacja kopii przed przejściem do SSA. Każda kopia x = s dostaje numer
+# bitu, a zbiory kopii są liczbami całkowitymi używanymi jako wektory bitowe.
+# To definicje osiągające ograniczone do kopii: spotkanie przez przecięcie
+# (kopia musi dotrzeć każdą ścieżką), a zabija je zapis zarówno do x, jak i do s.
+# Użycie x, do którego dociera taka kopia, czyta od razu s.
+
+
+def is_copy(instruction):
+    return (isinstance(instruction, Assignment) and isinstance(instruction.value, (Const, Temp, Var))
+            and instruction.value is not instruction.variable)
+
+
+def reaching_copies(cfg):
+    # sources[bit] = źródło kopii sprzed przepisywania, by_target/by_source = maski kopii
+    sources = []
+    by_target = {}
+    by_source = {}
+    block_copies = []
+    for block in cfg.blocks:
+        bits = []
+        for instruction in block.instructions:
+            bit = 0
+            if is_copy(instruction):
+                bit = 1 << len(sources)
+                sources.append(instruction.value)
+                by_target[instruction.variable] = by_target.get(instruction.variable, 0) | bit
+                if not isinstance(instruction.value, Const):
+                    by_source[instruction.value] = by_source.get(instruction.value, 0) | bit
+            bits.append(bit)
+        block_copies.append(bits)
+
+    killed = {variable: by_target.get(variable, 0) | by_source.get(variable, 0)
+              for variable in set(by_target) | set(by_source)}
+
+    gen = [0] * len(cfg.blocks)
+    kill = [0] * len(cfg.blocks)
+    for block in cfg.blocks:
+        for instruction, bit in zip(block.instructions, block_copies[block.index]):
+            mask = killed.get(instruction_def(instruction), 0)
+            kill[block.index] |= mask
+            gen[block.index] = (gen[block.index] & ~mask) | bit
+
+    everything = (1 << len(sources)) - 1
+    order = reverse_postorder(cfg)
+    reach_in = [0] * len(cfg.blocks)
+    reach_out = [everything] * len(cfg.blocks)
+    changed = True
+    while changed:
+        changed = False
+        for index in order:
+            incoming = 0
+            if index != 0:
+                incoming = everything
+                for pred in cfg.pred[index]:
+                    incoming &= reach_out[pred]
+            outgoing = gen[index] | (incoming & ~kill[index])
+            reach_in[index] = incoming
+            if outgoing != reach_out[index]:
+                reach_out[index] = outgoing
+                changed = True
+    return sources, by_target, killed, block_copies, reach_in, order
+
+
+def copy_propagation(cfg):
+    sources, by_target, killed, block_copies, reach_in, order = reaching_copies(cfg)
+    if not sources:
+        return 0
+
+    propagated = 0
+    for index in order:
+        block = cfg.blocks[index]
+        current = reach_in[index]
+
+        def replace(operand):
+            nonlocal propagated
+            # Łańcuch y = z; x = y rozwijamy, dopóki kopia źródła też dociera do użycia
+            while operand in by_target:
+                reaching = current & by_target[operand]
+                if not reaching:
+                    break
+                operand = sources[reaching.bit_length() - 1]
+                propagated += 1
+            return operand
+
+        for instruction, bit in zip(block.instructions, block_copies[index]):
+            rewrite_uses(instruction, replace)
+            current = (current & ~killed.get(instruction_def(instruction), 0)) | bit
+
+    return propagated + remove_dead_copies(cfg)
+
+
+def remove_dead_copies(cfg):
+    # Kopia do zmiennej, której nikt już nie czyta, jest zbędna
+    used = set()
+    for block in cfg.blocks:
+        for instruction in block.instructions:
+            used.update(instruction_uses(instruction))
+
+    removed = 0
+    for block in cfg.blocks:
+        kept = []
+        for instruction in block.instructions:
+            if isinstance(instruction, Assignment) and instruction.variable not in used:
+                removed += 1
+                continue
+            kept.append(instruction)
+        block.instructions = kept
+    return removed
+
+
+def coalesce_temps(cfg):
+    # t = a op b; x = t  ->  x = a op b, gdy t jest czytane tylko przez tę kopię,
+    # a x nie jest czytane ani zapisywane pomiędzy (ich czasy życia się nie przecinają)
+    uses = {}
+    defs = {}
+    for block in cfg.blocks:
+        for instruction in block.instructions:
+            for operand in instruction_uses(instruction):
+                uses[operand] = uses.get(operand, 0) + 1
+            result = instruction_def(instruction)
+            if result is not None:
+                defs[result] = defs.get(result, 0) + 1
+
+    coalesced = 0
+    for block in cfg.blocks:
+        producers = {}
+        kept = []
+        for instruction in block.instructions:
+            if isinstance(instruction, Assignment):
+                source = instruction.value
+                position = producers.get(source)
+                if (position is not None and uses.get(source) == 1 and defs.get(source) == 1
+                        and source.type == instruction.variable.type):
+                    target = instruction.variable
+                    between = kept[position + 1:]
+                    if all(target not in instruction_uses(other) and instruction_def(other) is not target
+                           for other in between):
+                        kept[position].result = target
+                        coalesced += 1
+                        continue
+
+            result = instruction_def(instruction)
+            if isinstance(result, Temp) and not isinstance(instruction, (Assignment, Phi)):
+                producers[result] = len(kept)
+            kept.append(instruction)
+        block.instructions = kept
+    return coalesced
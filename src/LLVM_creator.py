@@ -1,21 +1,255 @@
+import io
 import os
 
-class LLVM_Creator:
+from src.IRdataclasses import *
+from src.IRoperands import Const, Temp, Var, Undef
+from src.LLVM_cfg import build_cfg, conditional_jump, jump_target
+
+# Zamiana kodu czwórkowego po optymalizacjach (postać SSA) na moduł LLVM IR.
+# Każdy przedział FunctionDefinition..EndFunction to jedna funkcja, jej bloki
+# bierzemy z grafu przepływu sterowania. Tekst modułu powstaje jednym
+# przejściem po czwórkach i trafia do dowolnego obiektu plikowego, a deklaracje
+# użytych funkcji środowiska i napisy stałe z puli stałych są na końcu modułu.
+
+LLVM_TYPES = {'int': 'i32', 'boolean': 'i1', 'string': 'i8*', 'void': 'void'}
+
+# Funkcje z predefined.cpp: nazwa -> (typ wyniku, typy parametrów) w typach LLVM
+RUNTIME = {
+    'printInt': ('void', ['i32']),
+    'printString': ('void', ['i8*']),
+    'error': ('void', []),
+    'readInt': ('i32', []),
+    'readString': ('i8*', []),
+    'Concat': ('i8*', ['i8*', 'i8*']),
+    'stringsEqual': ('i32', ['i8*', 'i8*']),
+    'retainString': ('void', ['i8*']),
+    'releaseString': ('void', ['i8*']),
+}
+
+# Napis Latte to wskaźnik na { licznik, długość, znaki, bufor } z predefined.cpp;
+# literały mają licznik -1 i runtime nigdy ich nie zwalnia
+STATIC_REFCOUNT = -1
+
+ARITHMETIC = {'plus_op': 'add', 'minus_op': 'sub', 'times_op': 'mul', 'div_op': 'sdiv', 'mod_op': 'srem'}
+COMPARISONS = {'lt_op': 'slt', 'le_op': 'sle', 'gt_op': 'sgt', 'ge_op': 'sge', 'eq_op': 'eq', 'ne_op': 'ne'}
+
+
+def function_signatures(quadruples, function_table=None):
+    # nazwa -> (typ wyniku, typy parametrów) funkcji zdefiniowanych w module. Bez tablicy
+    # z SygnatureAnalyzer typ wyniku bierzemy z wartości zwracanych w ciele
+    signatures = {}
+    name = None
+    for instruction in quadruples:
+        if isinstance(instruction, FunctionDefinition):
+            name = instruction.name
+            if function_table is not None and name in function_table:
+                return_type = LLVM_TYPES[function_table[name]['return_type']]
+            else:
+                return_type = 'i32' if name == 'main' else 'void'
+            signatures[name] = (return_type, [LLVM_TYPES[param.type] for param in instruction.params or []])
+        elif (isinstance(instruction, ReturnStatement) and instruction.value is not None
+              and (function_table is None or name not in function_table)):
+            signatures[name] = (LLVM_TYPES[instruction.value.type], signatures[name][1])
+    return signatures
+
+
+def escape_bytes(data):
+    return ''.join(chr(byte) if 32 <= byte < 127 and byte not in (34, 92) else f'\\{byte:02X}' for byte in data)
+
+
+class ConstantPool:
+    # Każdy napis stały modułu to jedna globalna stała unnamed_addr, więc LLVM może
+    # ją też połączyć z identycznymi z innych modułów. literal() daje statyczny
+    # napis Latte z nagłówkiem, rzutowany na i8*.
     def __init__(self):
-      self.start_part = """
-define i32 @main() {
-entry:
-"""
-
-    def create_llvm(self, instructions, filename="TEST"):
-        base_filename = os.path.splitext(os.path.basename(filename))[0]
-        os.makedirs('foo/bar', exist_ok=True)
-
-        with open(f"foo/bar/{base_filename}.ll", mode='w') as file:
-            file.write(self.start_part)
-
-            for instruction in instructions:
-                file.write(f"  {instruction}\n")
-            
-            file.write("  ret i32 0\n")
-            file.write("}\n")
\ No newline at end of file
+        self.references = {}
+        self.globals = []
+
+    def literal(self, text):
+        reference = self.references.get(text)
+        if reference is None:
+            # Nagłówek napisu i jego znaki w jednej stałej: wskaźnik na znaki prowadzi do niej samej
+            data = text.encode('utf-8')
+            name = f"@.str.{len(self.globals)}"
+            array = f"[{len(data)} x i8]"
+            layout = f"{{ i32, i32, i8*, i8*, {array} }}"
+            chars = f"getelementptr inbounds ({layout}, {layout}* {name}, i32 0, i32 4, i32 0)"
+            self.globals.append(f'{name} = private unnamed_addr constant {layout} '
+                                f'{{ i32 {STATIC_REFCOUNT}, i32 {len(data)}, i8* {chars}, i8* null, '
+                                f'{array} c"{escape_bytes(data)}" }}\n')
+            reference = f"bitcast ({layout}* {name} to i8*)"
+            self.references[text] = reference
+        return reference
+
+    def definitions(self):
+        return self.globals
+
+
+class ModuleWriter:
+    def __init__(self, file, signatures):
+        self.write = file.write
+        self.signatures = dict(RUNTIME)
+        self.signatures.update(signatures)
+        self.defined = set(signatures)
+        # Funkcje środowiska wywoływane w module, w kolejności pierwszego użycia
+        self.runtime_used = {}
+        self.constants = ConstantPool()
+
+    def value(self, operand):
+        if isinstance(operand, Temp):
+            return f"%t{operand.index}"
+        if isinstance(operand, Var):
+            return f"%{operand.symbol.unique}"
+        if isinstance(operand, Const):
+            if operand.type == 'string':
+                return self.constants.literal(operand.value)
+            if operand.type == 'boolean':
+                return 'true' if operand.value else 'false'
+            return str(operand.value)
+        if isinstance(operand, Undef):
+            return 'undef'
+        raise Exception(f"Cannot lower operand {operand!r} to LLVM")
+
+    def typed(self, operand):
+        return f"{LLVM_TYPES[operand.type]} {self.value(operand)}"
+
+    def use(self, name):
+        if name in RUNTIME and name not in self.defined:
+            self.runtime_used[name] = RUNTIME[name]
+
+    def module(self, quadruples):
+        for cfg in build_cfg(quadruples):
+            self.function(cfg)
+        # Deklaracja może stać po wywołaniu, więc wystarczy jedno przejście
+        for name, (return_type, params) in self.runtime_used.items():
+            self.write(f"declare {return_type} @{name}({', '.join(params)})\n")
+        if self.runtime_used:
+            self.write("\n")
+        for definition in self.constants.definitions():
+            self.write(definition)
+
+    def function(self, cfg):
+        return_type = self.signatures[cfg.name][0]
+        params = ', '.join(self.typed(param) for param in cfg.definition.params or [])
+        self.write(f"define {return_type} @{cfg.name}({params}) {{\n")
+        # Koniec funkcji bez return: w funkcji void to powrót, w pozostałych nieosiągalny
+        fall_off = "  ret void\n" if return_type == 'void' else "  unreachable\n"
+        blocks = cfg.blocks
+        exit_needed = False
+        for block in blocks:
+            last = block.index + 1 == len(blocks)
+            following = 'exit' if last else blocks[block.index + 1].label.name
+            self.write(f"{block.label.name}:\n")
+            for instruction in block.instructions:
+                self.instruction(instruction, following)
+            terminator = block.terminator()
+            if terminator is None:
+                self.write(fall_off if last else f"  br label %{following}\n")
+            elif last and conditional_jump(terminator) is not None:
+                exit_needed = True
+        if exit_needed:
+            self.write("exit:\n" + fall_off)
+        self.write("}\n\n")
+
+    def instruction(self, instruction, following):
+        write = self.write
+        conditional = conditional_jump(instruction)
+        if conditional is not None:
+            condition, target, jump_if = conditional
+            if target.name == following:
+                write(f"  br label %{following}\n")
+            elif jump_if:
+                write(f"  br i1 {self.value(condition)}, label %{target.name}, label %{following}\n")
+            else:
+                write(f"  br i1 {self.value(condition)}, label %{following}, label %{target.name}\n")
+            return
+
+        target = jump_target(instruction)
+        if target is not None:
+            write(f"  br label %{target.name}\n")
+        elif isinstance(instruction, BinaryOperation):
+            if instruction.operator not in ARITHMETIC or instruction.result.type != 'int':
+                raise Exception(f"Unsupported binary operation {instruction.operator} on {instruction.result.type}")
+            write(f"  {self.value(instruction.result)} = {ARITHMETIC[instruction.operator]} i32 "
+                  f"{self.value(instruction.left)}, {self.value(instruction.right)}\n")
+        elif isinstance(instruction, UnaryOperation):
+            if instruction.operator == '-':
+                write(f"  {self.value(instruction.result)} = sub i32 0, {self.value(instruction.operand)}\n")
+            else:
+                write(f"  {self.value(instruction.result)} = xor i1 {self.value(instruction.operand)}, true\n")
+        elif isinstance(instruction, LogicalOperation):
+            self.comparison(instruction)
+        elif isinstance(instruction, FunctionCall):
+            self.call(instruction)
+        elif isinstance(instruction, Phi):
+            incoming = ', '.join(f"[ {self.value(value)}, %{label.name} ]" for label, value in instruction.incoming)
+            write(f"  {self.value(instruction.result)} = phi {LLVM_TYPES[instruction.result.type]} {incoming}\n")
+        elif isinstance(instruction, ReturnStatement):
+            if instruction.value is None:
+                write("  ret void\n")
+            else:
+                write(f"  ret {self.typed(instruction.value)}\n")
+        elif isinstance(instruction, Label):
+            # Po zbudowaniu grafu zostają tylko znaczniki początku i końca bloku
+            pass
+        else:
+            raise Exception(f"Cannot lower {type(instruction).__name__} to LLVM (expected SSA form)")
+
+    def comparison(self, instruction):
+        if instruction.operator not in COMPARISONS:
+            raise Exception(f"Unsupported logical operation {instruction.operator}")
+        result = self.value(instruction.result)
+        if instruction.left.type == 'string':
+            if instruction.operator not in ('eq_op', 'ne_op'):
+                raise Exception(f"Unsupported string comparison {instruction.operator}")
+            self.use('stringsEqual')
+            self.write(f"  {result}.eq = call i32 @stringsEqual({self.typed(instruction.left)}, "
+                       f"{self.typed(instruction.right)})\n")
+            predicate = 'ne' if instruction.operator == 'eq_op' else 'eq'
+            self.write(f"  {result} = icmp {predicate} i32 {result}.eq, 0\n")
+            return
+        self.write(f"  {result} = icmp {COMPARISONS[instruction.operator]} {LLVM_TYPES[instruction.left.type]} "
+                   f"{self.value(instruction.left)}, {self.value(instruction.right)}\n")
+
+    def call(self, instruction):
+        if instruction.name not in self.signatures:
+            raise Exception(f"Call to undefined function {instruction.name}")
+        self.use(instruction.name)
+        return_type, params = self.signatures[instruction.name]
+        arguments = ', '.join(f"{param_type} {self.value(argument)}"
+                              for param_type, argument in zip(params, instruction.params))
+        call = f"{instruction.tail} call" if instruction.tail is not None else "call"
+        if return_type == 'void':
+            self.write(f"  {call} void @{instruction.name}({arguments})\n")
+        else:
+            self.write(f"  {self.value(instruction.result)} = {call} {return_type} @{instruction.name}({arguments})\n")
+
+
+class LLVM_Creator:
+    def __init__(self, function_table=None):
+        self.function_table = function_table
+
+    def emit_llvm(self, instructions, file):
+        ModuleWriter(file, function_signatures(instructions, self.function_table)).module(instructions)
+
+    def render_llvm(self, instructions):
+        buffer = io.StringIO()
+        self.emit_llvm(instructions, buffer)
+        return buffer.getvalue()
+
+    def write_llvm(self, llvm, filename="TEST", output_dir='foo/bar', output_path=None):
+        # output_path wskazuje plik wprost, w przeciwnym razie <output_dir>/<nazwa>.ll
+        if output_path is None:
+            base_filename = os.path.splitext(os.path.basename(filename))[0]
+            output_path = os.path.join(output_dir, f"{base_filename}.ll")
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(output_path, mode='w') as file:
+            file.write(llvm)
+
+        return output_path
+
+    def create_llvm(self, instructions, filename="TEST", output_dir='foo/bar', output_path=None):
+        return self.write_llvm(self.render_llvm(instructions), filename, output_dir, output_path)
@@ -0,0 +1,194 @@
+from src.IRdataclasses import *
+from src.IRoperands import Const, BLOCK_START, BLOCK_END
+from src.LLVM_cfg import CONTROL_OPERATORS, conditional_jump, jump_target, instruction_uses, instruction_def, rewrite_uses
+from src.LLVM_gvn import PURE_FUNCTIONS
+
+# Usuwanie martwego kodu: skoki warunkowe ze stałym warunkiem stają się
+# bezwarunkowe, bloki nieosiągalne z wejścia znikają, a potem mark-and-sweep
+# usuwa instrukcje bez efektów ubocznych, których wyników nikt nie czyta.
+
+
+def is_pure(instruction):
+    if isinstance(instruction, (UnaryOperation, Phi)):
+        return True
+    if isinstance(instruction, BinaryOperation):
+        # Dzielenie przez zero i INT_MIN / -1 kończą program błędem, więc dzielenie zostaje,
+        # chyba że dzielnik jest znaną stałą różną od 0 i -1 (jak w fold_binary)
+        if instruction.operator in ('div_op', 'mod_op'):
+            return isinstance(instruction.right, Const) and instruction.right.value not in (0, -1)
+        return True
+    if isinstance(instruction, LogicalOperation):
+        return instruction.operator not in CONTROL_OPERATORS
+    if isinstance(instruction, FunctionCall):
+        return instruction.name in PURE_FUNCTIONS
+    return False
+
+
+def fold_branches(cfg):
+    folded = 0
+    for block in cfg.blocks:
+        if not block.instructions:
+            continue
+        conditional = conditional_jump(block.instructions[-1])
+        if conditional is None or not isinstance(conditional[0], Const):
+            continue
+        condition, target, jump_if = conditional
+        if condition.value == jump_if:
+            block.instructions[-1] = Jump(target=target)
+        else:
+            block.instructions.pop()
+        folded += 1
+    return folded
+
+
+def prune_phis(cfg):
+    # Po usunięciu krawędzi phi tracą wejścia z bloków, które nie są już poprzednikami;
+    # phi z jedną wartością zastępujemy tą wartością
+    replacement = {}
+
+    def resolve(operand):
+        while operand in replacement:
+            operand = replacement[operand]
+        return operand
+
+    for block in cfg.blocks:
+        if not block.instructions or not isinstance(block.instructions[0], Phi):
+            continue
+        preds = {cfg.blocks[pred].label for pred in cfg.pred[block.index]}
+        kept = []
+        for instruction in block.instructions:
+            if isinstance(instruction, Phi):
+                instruction.incoming = [(label, value) for label, value in instruction.incoming if label in preds]
+                values = {value for _, value in instruction.incoming}
+                values.discard(instruction.result)
+                if len(values) == 1:
+                    replacement[instruction.result] = values.pop()
+                    continue
+            kept.append(instruction)
+        block.instructions = kept
+
+    if replacement:
+        for block in cfg.blocks:
+            for instruction in block.instructions:
+                rewrite_uses(instruction, resolve)
+    return len(replacement)
+
+
+def sweep_dead_instructions(cfg):
+    definitions = {}
+    for block in cfg.blocks:
+        for instruction in block.instructions:
+            result = instruction_def(instruction)
+            if result is not None:
+                definitions[result] = instruction
+
+    # Instrukcje są porównywane po wartości, więc zaznaczamy je po id()
+    live = set()
+    worklist = []
+    for block in cfg.blocks:
+        for instruction in block.instructions:
+            if not is_pure(instruction):
+                live.add(id(instruction))
+                worklist.extend(instruction_uses(instruction))
+
+    while worklist:
+        instruction = definitions.get(worklist.pop())
+        if instruction is not None and id(instruction) not in live:
+            live.add(id(instruction))
+            worklist.extend(instruction_uses(instruction))
+
+    removed = 0
+    for block in cfg.blocks:
+        kept = [instruction for instruction in block.instructions if id(instruction) in live]
+        removed += len(block.instructions) - len(kept)
+        block.instructions = kept
+    return removed
+
+
+def remove_empty_scopes(cfg):
+    # Para block_start/block_end bez niczego w środku (także zagnieżdżona) nic nie znaczy
+    removed = 0
+    for block in cfg.blocks:
+        kept = []
+        for instruction in block.instructions:
+            if (isinstance(instruction, Label) and instruction.name is BLOCK_END
+                    and kept and isinstance(kept[-1], Label) and kept[-1].name is BLOCK_START):
+                kept.pop()
+                removed += 2
+                continue
+            kept.append(instruction)
+        block.instructions = kept
+    return removed
+
+
+def retarget(instruction, label):
+    if isinstance(instruction, (Jump, ConditionalJump)):
+        instruction.target = label
+    elif isinstance(instruction, LogicalOperation):
+        instruction.result = label
+
+
+def thread_jumps(cfg):
+    # Skok do pustego bloku (bez instrukcji albo z samym goto) prowadzimy od razu
+    # do miejsca, gdzie trafi sterowanie. Bloków z phi nie omijamy, bo phi
+    # rozróżniają poprzedników. Skok warunkowy, którego obie drogi prowadzą
+    # w to samo miejsce, i goto do następnego bloku są zbędne.
+    count = len(cfg.blocks)
+    forward = {}
+    has_phi = set()
+    for block in cfg.blocks:
+        if block.instructions and isinstance(block.instructions[0], Phi):
+            has_phi.add(block.label)
+        if block.index == 0:
+            continue
+        if not block.instructions and block.index + 1 < count:
+            forward[block.label] = cfg.blocks[block.index + 1].label
+        elif len(block.instructions) == 1 and jump_target(block.instructions[0]) is not None:
+            forward[block.label] = jump_target(block.instructions[0])
+
+    def destination(label):
+        seen = set()
+        while label in forward and label not in seen and forward[label] not in has_phi:
+            seen.add(label)
+            label = forward[label]
+        return label
+
+    simplified = 0
+    for block in cfg.blocks:
+        if not block.instructions:
+            continue
+        last = block.instructions[-1]
+        target = jump_target(last)
+        conditional = conditional_jump(last)
+        if conditional is not None:
+            target = conditional[1]
+        if target is None:
+            continue
+
+        final = destination(target)
+        if final is not target:
+            retarget(last, final)
+            simplified += 1
+        following = destination(cfg.blocks[block.index + 1].label) if block.index + 1 < count else None
+        if final is following:
+            block.instructions.pop()
+            simplified += 1
+    return simplified
+
+
+def dead_code_elimination(cfg):
+    # Zwraca (usunięte instrukcje, usunięte bloki)
+    removed = fold_branches(cfg)
+    if removed:
+        cfg.compute_edges()
+    removed_blocks = cfg.remove_unreachable()
+    removed += prune_phis(cfg)
+    removed += sweep_dead_instructions(cfg)
+    removed += remove_empty_scopes(cfg)
+
+    if thread_jumps(cfg):
+        cfg.compute_edges()
+        removed_blocks += cfg.remove_unreachable()
+        removed += prune_phis(cfg)
+        removed += sweep_dead_instructions(cfg)
+    return removed, removed_blocks
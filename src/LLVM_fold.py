@@ -0,0 +1,161 @@
+from src.IRdataclasses import *
+from src.IRoperands import Const, TRUE, FALSE
+from src.LLVM_cfg import rewrite_uses
+from src.LLVM_refcount import retain
+
+# Zwijanie stałych wspólne dla SemanticAnalyzer (na drzewie) i dla kodu czwórkowego
+# w postaci SSA. Liczby całkowite zachowują się jak i32 w LLVM: zawijają się
+# modulo 2^32, a dzielenia, które w LLVM są niezdefiniowane, zostają na czas wykonania.
+
+INT_MIN = -2 ** 31
+INT_MAX = 2 ** 31 - 1
+
+RELATIONS = {
+    'lt_op': lambda a, b: a < b,
+    'le_op': lambda a, b: a <= b,
+    'gt_op': lambda a, b: a > b,
+    'ge_op': lambda a, b: a >= b,
+    'eq_op': lambda a, b: a == b,
+    'ne_op': lambda a, b: a != b,
+}
+
+
+def wrap_int(value):
+    return (value - INT_MIN) % 2 ** 32 + INT_MIN
+
+
+def truncated_div(left, right):
+    quotient = abs(left) // abs(right)
+    return quotient if (left >= 0) == (right >= 0) else -quotient
+
+
+def fold_binary(operator, left, right):
+    if left.type == 'string' and right.type == 'string' and operator == 'plus_op':
+        return Const(left.value + right.value, 'string')
+    if left.type != 'int' or right.type != 'int':
+        return None
+
+    a, b = left.value, right.value
+    if operator == 'plus_op':
+        return Const(wrap_int(a + b), 'int')
+    if operator == 'minus_op':
+        return Const(wrap_int(a - b), 'int')
+    if operator == 'times_op':
+        return Const(wrap_int(a * b), 'int')
+    if operator in ('div_op', 'mod_op'):
+        if b == 0 or (a == INT_MIN and b == -1):
+            return None
+        quotient = truncated_div(a, b)
+        return Const(quotient if operator == 'div_op' else a - quotient * b, 'int')
+    return None
+
+
+def fold_relation(operator, left, right):
+    # Napisy porównuje runtime, tu zwijamy tylko int i boolean
+    if left.type == 'string' or left.type != right.type or operator not in RELATIONS:
+        return None
+    return TRUE if RELATIONS[operator](left.value, right.value) else FALSE
+
+
+def fold_unary(operator, operand):
+    if operator == '!' and operand.type == 'boolean':
+        return FALSE if operand.value else TRUE
+    if operator == '-' and operand.type == 'int':
+        return Const(wrap_int(-operand.value), 'int')
+    return None
+
+
+def is_const(operand, value, type):
+    return operand is not None and operand.type == type and operand.value == value
+
+
+def identity_side(operator, left, right):
+    # Która strona jest wynikiem, gdy druga jest elementem neutralnym (x+0, 1*x, x/1, s+"");
+    # left/right to stałe albo None, gdy strona nie jest znana w czasie kompilacji
+    if operator == 'plus_op':
+        if is_const(right, 0, 'int') or is_const(right, '', 'string'):
+            return 'left'
+        if is_const(left, 0, 'int') or is_const(left, '', 'string'):
+            return 'right'
+    elif operator == 'minus_op':
+        if is_const(right, 0, 'int'):
+            return 'left'
+    elif operator == 'times_op':
+        if is_const(right, 1, 'int'):
+            return 'left'
+        if is_const(left, 1, 'int'):
+            return 'right'
+    elif operator == 'div_op':
+        if is_const(right, 1, 'int'):
+            return 'left'
+    return None
+
+
+def fold_instruction(instruction):
+    # Wartość wyniku instrukcji, jeśli da się ją wyznaczyć z operandów, inaczej None
+    if isinstance(instruction, BinaryOperation):
+        left, right = instruction.left, instruction.right
+        left_const = left if isinstance(left, Const) else None
+        right_const = right if isinstance(right, Const) else None
+        if left_const is not None and right_const is not None:
+            return fold_binary(instruction.operator, left_const, right_const)
+        side = identity_side(instruction.operator, left_const, right_const)
+        if side is not None:
+            return left if side == 'left' else right
+    elif isinstance(instruction, UnaryOperation):
+        if isinstance(instruction.operand, Const):
+            return fold_unary(instruction.operator, instruction.operand)
+    elif isinstance(instruction, LogicalOperation):
+        if isinstance(instruction.left, Const) and isinstance(instruction.right, Const):
+            return fold_relation(instruction.operator, instruction.left, instruction.right)
+    elif isinstance(instruction, FunctionCall) and instruction.name == 'Concat':
+        # Dwa literały dają literał (statyczny); s + "" daje s, a referencję, której
+        # oczekuje dalszy kod, dokłada fold_constants
+        left, right = instruction.params
+        left_const = left if isinstance(left, Const) else None
+        right_const = right if isinstance(right, Const) else None
+        if left_const is not None and right_const is not None:
+            return fold_binary('plus_op', left_const, right_const)
+        side = identity_side('plus_op', left_const, right_const)
+        if side is not None:
+            return left if side == 'left' else right
+    elif isinstance(instruction, Phi):
+        values = {value for _, value in instruction.incoming}
+        values.discard(instruction.result)
+        if len(values) == 1:
+            return values.pop()
+    return None
+
+
+def fold_constants(cfg, order=None):
+    # Jeden przebieg w kolejności bloków: w SSA definicja poprzedza użycia poza phi,
+    # a phi z krawędzi powrotnych dostają podstawienia w końcowym przepisaniu
+    replacement = {}
+
+    def resolve(operand):
+        while operand in replacement:
+            operand = replacement[operand]
+        return operand
+
+    folded = 0
+    blocks = cfg.blocks if order is None else [cfg.blocks[index] for index in order]
+    for block in blocks:
+        kept = []
+        for instruction in block.instructions:
+            rewrite_uses(instruction, resolve)
+            value = fold_instruction(instruction)
+            if value is not None:
+                replacement[instruction.result] = value
+                folded += 1
+                if isinstance(instruction, FunctionCall) and not isinstance(value, Const):
+                    # Wynik wywołania to własna referencja, którą kod potem zwalnia
+                    kept.append(retain(value))
+                continue
+            kept.append(instruction)
+        block.instructions = kept
+
+    if replacement:
+        for block in cfg.blocks:
+            for instruction in block.instructions:
+                rewrite_uses(instruction, resolve)
+    return folded
@@ -1,5 +1,33 @@
 from lark.visitors import Visitor
 from lark import Tree, Token
+from src.LLVM_visitor import DispatchVisitor
+from src.LLVM_symbols import Symbol, SymbolTable
+from src.IRoperands import Const, TRUE, FALSE
+from src.LLVM_fold import fold_binary, fold_relation, fold_unary, identity_side
+
+COMPILER_VERSION = '0.22'
+
+# Funkcje środowiska, które wywołuje sam kod wygenerowany (dodawanie i porównanie
+# napisów, liczniki referencji); program nie może zdefiniować funkcji o tych nazwach
+RUNTIME_HELPERS = ('Concat', 'stringsEqual', 'retainString', 'releaseString')
+
+
+class Annotations:
+    # Wyniki analizy semantycznej przypięte do węzłów drzewa po ich id().
+    # Backend czyta je bezpośrednio zamiast ponownie wyznaczać typy i zmienne.
+    def __init__(self):
+        self.types = {}
+        self.symbols = {}
+        # Wyrażenia znane w czasie kompilacji: stała (Const) albo poddrzewo,
+        # które daje tę samą wartość (x+0 -> x, true && e -> e)
+        self.folded = {}
+
+    def type_of(self, tree):
+        return self.types[id(tree)]
+
+    def symbol_of(self, tree):
+        return self.symbols[id(tree)]
+
 
 class SygnatureAnalyzer(Visitor):
     def __init__(self):
@@ -32,6 +60,9 @@ class SygnatureAnalyzer(Visitor):
         if func_name in self.function_table:
             raise Exception(f"Function {func_name} is already defined")
 
+        if func_name in RUNTIME_HELPERS:
+            raise Exception(f"Function name {func_name} is reserved for the runtime")
+
         self.function_table[func_name] = {
             'return_type': return_type,
             'params': param_types
@@ -109,60 +140,67 @@ class FunctionCallAnalyzer(Visitor):
         raise Exception(f"Unknown type for argument: {arg}")
     
 
-class BlockAnalyzer:
-    def __init__(self):
-        self.symbol_table_stack = [{}]
-        self.temp_types = {} # Na typy rejestrów żeby pamiętać o nich
-        self.block_counter = 0
-
-    def enter_block(self):
-        self.symbol_table_stack.append({})
-        self.block_counter += 1
+# Wspólna implementacja tablicy symboli dla frontendu i backendu
+BlockAnalyzer = SymbolTable
+
+
+class SemanticAnalyzer(DispatchVisitor):
+    visit_handlers = {
+        'topdef': 'topdef',
+        'ret_stmt': 'ret_stmt',
+        'vret_stmt': 'vret_stmt',
+        'if_stmt': 'if_stmt',
+        'if_else_stmt': 'if_else_stmt',
+        'while_stmt': 'while_stmt',
+        'variable': 'variable',
+        'decl_stmt': 'decl_stmt',
+        'assign_stmt': 'assign_stmt',
+        'block': 'block',
+        # Ogólny handler dla wyrażeń
+        'int_expr': 'eval_expr',
+        'boolean_expr': 'eval_expr',
+        'true_expr': 'eval_expr',
+        'false_expr': 'eval_expr',
+        'string_expr': 'eval_expr',
+        'var_expr': 'eval_expr',
+        'add_expr': 'eval_expr',
+        'sub_expr': 'eval_expr',
+        'and_expr': 'eval_expr',
+        'or_expr': 'eval_expr',
+        'not_expr': 'eval_expr',
+        'mul_expr': 'eval_expr',
+        'div_expr': 'eval_expr',
+        'rel_expr': 'eval_expr',
+        'paren_expr': 'eval_expr',
+        'func_call_expr': 'eval_expr',
+        'decr_stmt': 'decr_stmt',
+        'incr_stmt': 'incr_stmt',
+        'neg_expr': 'eval_expr',
+    }
+
+    expr_handlers = {
+        'int_expr': 'eval_int_expr',
+        'boolean_expr': 'eval_boolean_expr',
+        'true_expr': 'eval_boolean_literal',
+        'false_expr': 'eval_boolean_literal',
+        'string_expr': 'eval_string_expr',
+        'var_expr': 'eval_var_expr',
+        'add_expr': 'eval_add_expr',
+        'sub_expr': 'eval_sub_expr',
+        'and_expr': 'eval_and_expr',
+        'or_expr': 'eval_or_expr',
+        'not_expr': 'eval_not_expr',
+        'mul_expr': 'eval_mul_expr',
+        'div_expr': 'eval_div_expr',
+        'rel_expr': 'eval_rel_expr',
+        'paren_expr': 'eval_paren_expr',
+        'func_call_expr': 'func_call_expr',
+        'neg_expr': 'neg_expr',
+    }
+
+    # Węzły, które wymagają odwiedzenia poddrzew
+    passthrough_nodes = frozenset({'start', 'program', 'stmt', 'stmt_list', 'expr_list', 'expr_stmt'})
 
-    def exit_block(self):
-        if len(self.symbol_table_stack) > 1:
-            self.symbol_table_stack.pop()
-        else:
-            raise Exception("Attempted to exit global scope")
-
-    def declare_variable(self, var_name, var_type, value_tree=None):
-        current_scope = self.symbol_table_stack[-1]
-        n = len(self.symbol_table_stack)
-        if var_name in current_scope:
-            raise Exception(f"Variable {var_name} already declared in this scope")
-        #TU DODAŁEM NUMER SCOPA ŻEBY ZMIENNA BYŁA INNA
-        # current_scope[var_name + f"{n}"] = var_type
-        current_scope[var_name] = var_type
-
-    def get_variable_type(self, var_name):
-        ########## MOŻLIWE ŻE DO WYWALENIA JEŚLI BĘDZIE KONFLIKT Z NODAMI ########
-        # print("VAR NAME: ",var_name)
-        
-        if var_name.startswith('"') and var_name.endswith('"'):
-            return 'string'
-        if var_name.isdigit():
-            return 'int'
-
-        # Obsługa rejestrów tymczasowych
-        if var_name in self.temp_types:
-            return self.temp_types[var_name]
-        ########## MOŻLIWE ŻE DO WYWALENIA JEŚLI BĘDZIE KONFLIKT Z NODAMI ########
-        try:
-            for scope in reversed(self.symbol_table_stack):
-                if var_name in scope:
-                    return scope[var_name]
-        except:
-            raise Exception(f"Variable '{var_name}' not declared")
-        
-
-    def set_temp_type(self, temp, var_type):
-        self.temp_types[temp] = var_type
-
-    def reset(self):
-        self.symbol_table_stack = [{}]
-    
-
-class SemanticAnalyzer(Visitor):
     def __init__(self, function_table):
         self.function_table = function_table
         self.block_analyzer = BlockAnalyzer()
@@ -170,6 +208,9 @@ class SemanticAnalyzer(Visitor):
         self.current_function = (None, False)
         self.code_reachable = True
 
+        self.annotations = Annotations()
+        self.expr_results = self.annotations.types
+
     def which_col_row(self, tree):
         first_token = next((child for child in tree.children if isinstance(child, Token)), None)
         if first_token:
@@ -179,83 +220,44 @@ class SemanticAnalyzer(Visitor):
             row = col = None
         return row, col
 
-    def visit(self, tree):
-        handlers = {
-            'topdef': self.topdef,
-            'ret_stmt': self.ret_stmt,
-            'vret_stmt': self.vret_stmt,
-            'if_stmt': self.if_stmt,
-            'if_else_stmt': self.if_else_stmt,
-            'while_stmt': self.while_stmt,
-            'variable':self.variable,
-            'decl_stmt':self.decl_stmt,
-            'assign_stmt':self.assign_stmt,
-            'block':self.block,
-            # Ogólny handler dla wyrażeń
-            'int_expr': self.eval_expr,
-            'boolean_expr': self.eval_expr,
-            'true_expr': self.eval_expr,
-            'false_expr': self.eval_expr,
-            'string_expr': self.eval_expr,
-            'var_expr': self.eval_expr,
-            'add_expr': self.eval_expr,
-            'sub_expr': self.eval_expr,
-            'and_expr': self.eval_expr,
-            'or_expr': self.eval_expr,
-            'not_expr': self.eval_expr,
-            'mul_expr': self.eval_expr,
-            'div_expr': self.eval_expr,
-            'rel_expr': self.eval_expr,
-            'paren_expr': self.eval_expr,
-            'func_call_expr': self.eval_expr,
-            'decr_stmt': self.decr_stmt,
-            'incr_stmt': self.incr_stmt,
-            'neg_expr': self.eval_expr,
-        }
-
-
-        # Węzły, które wymagają odwiedzenia poddrzew
-        passthrough_nodes = {'start', 'program', 'stmt', 'stmt_list', 'expr_list', 'expr_stmt'}
-
-        # Obsługa węzłów z dedykowaną logiką
-        if tree.data in handlers:
-            return handlers[tree.data](tree)
+    def constant_of(self, tree):
+        data = tree.data
+        if data == 'int_expr':
+            return Const(int(tree.children[0].value), 'int')
+        if data == 'true_expr':
+            return TRUE
+        if data == 'false_expr':
+            return FALSE
+        if data == 'string_expr':
+            return Const.from_literal(tree.children[0].value)
+        if data == 'paren_expr':
+            return self.constant_of(tree.children[0])
+        value = self.annotations.folded.get(id(tree))
+        return value if isinstance(value, Const) else None
+
+    def fold_binary_expr(self, tree, operator, left, right):
+        left_value = self.constant_of(left)
+        right_value = self.constant_of(right)
+        if left_value is not None and right_value is not None:
+            value = fold_binary(operator, left_value, right_value)
+            if value is not None:
+                self.annotations.folded[id(tree)] = value
+                return
+        side = identity_side(operator, left_value, right_value)
+        if side is not None:
+            self.annotations.folded[id(tree)] = left if side == 'left' else right
+
+    def fold_logical_expr(self, tree, absorbing):
+        # absorbing: wartość, która rozstrzyga wynik (false dla &&, true dla ||)
+        left, right = tree.children
+        left_value = self.constant_of(left)
+        right_value = self.constant_of(right)
+        if left_value is not None:
+            # Prawa strona nie zostanie obliczona albo jest wynikiem
+            self.annotations.folded[id(tree)] = left_value if left_value.value == absorbing else right
+        elif right_value is not None and right_value.value != absorbing:
+            self.annotations.folded[id(tree)] = left
 
-        # Jeśli węzeł wymaga odwiedzenia poddrzew, przejdź przez dzieci
-        elif tree.data in passthrough_nodes:
-            for child in tree.children:
-                if isinstance(child, Tree):
-                    self.visit(child)
-
-        else:
-            raise Exception(f"Unhandled node type: {tree.data}")
-
-    def eval_expr(self, tree):
-        handlers = {
-            'int_expr': self.eval_int_expr,
-            'boolean_expr': self.eval_boolean_expr,
-            'true_expr': self.eval_boolean_literal,
-            'false_expr': self.eval_boolean_literal,
-            'string_expr': self.eval_string_expr,
-            'var_expr': self.eval_var_expr,
-            'add_expr': self.eval_add_expr,
-            'sub_expr': self.eval_sub_expr,
-            'and_expr': self.eval_and_expr,
-            'or_expr': self.eval_or_expr,
-            'not_expr': self.eval_not_expr,
-            'mul_expr': self.eval_mul_expr,
-            'div_expr': self.eval_div_expr,
-            'rel_expr': self.eval_rel_expr,
-            'paren_expr': self.eval_paren_expr,
-            'func_call_expr': self.func_call_expr,
-            'neg_expr': self.neg_expr,
-        }
-
-        if tree.data in handlers:
-            return handlers[tree.data](tree)
-        else:
-            raise Exception(f"Unsupported expression type: {tree.data}")
-        
     def eval_int_expr(self, tree):
         return 'int'
 
@@ -270,80 +272,95 @@ class SemanticAnalyzer(Visitor):
 
     def eval_var_expr(self, tree):
         var_name = tree.children[0].value
-        return self.block_analyzer.get_variable_type(var_name)
+        symbol = self.block_analyzer.get_symbol(var_name)
+        if symbol is None:
+            return None
+        self.annotations.symbols[id(tree)] = symbol
+        return symbol.type
 
     def eval_add_expr(self, tree):
-        left_type = self.eval_expr(tree.children[0])
+        left_type = yield tree.children[0]
         operator = tree.children[1]
-        right_type = self.eval_expr(tree.children[2])
-        if left_type == 'int' and right_type == 'int':
-            return 'int'
-        if left_type == 'string' and right_type == 'string':
-            return 'string'
+        right_type = yield tree.children[2]
+        if left_type == right_type and left_type in ('int', 'string'):
+            self.fold_binary_expr(tree, operator.data, tree.children[0], tree.children[2])
+            return left_type
         raise Exception(f"Type error: Cannot add '{left_type}' and '{right_type}'")
 
     def eval_sub_expr(self, tree):
-        left_type = self.eval_expr(tree.children[0])
+        left_type = yield tree.children[0]
         operator = tree.children[1]
-        right_type = self.eval_expr(tree.children[2])
+        right_type = yield tree.children[2]
         if left_type == 'int' and right_type == 'int':
             return 'int'
         raise Exception(f"Type error: Cannot subtract '{left_type}' and '{right_type}'")
 
     def eval_mul_expr(self,tree):
-        left_type = self.eval_expr(tree.children[0])
+        left_type = yield tree.children[0]
         operator = tree.children[1]
-        right_type = self.eval_expr(tree.children[2])
+        right_type = yield tree.children[2]
         if left_type == 'int' and right_type == 'int':
+            self.fold_binary_expr(tree, operator.data, tree.children[0], tree.children[2])
             return 'int'
         raise Exception(f"Type error: Cannot multiply '{left_type}' and '{right_type}'")
 
     def eval_div_expr(self,tree):
-        left_type = self.eval_expr(tree.children[0])
+        left_type = yield tree.children[0]
         operator = tree.children[1]
-        right_type = self.eval_expr(tree.children[2])
+        right_type = yield tree.children[2]
         if left_type == 'int' and right_type == 'int':
             return 'int'
         raise Exception(f"Type error: Cannot divide '{left_type}' and '{right_type}'")
 
     def eval_and_expr(self, tree):
-        left_type = self.eval_expr(tree.children[0])
-        right_type = self.eval_expr(tree.children[1])
+        left_type = yield tree.children[0]
+        right_type = yield tree.children[1]
         if left_type == 'boolean' and right_type == 'boolean':
+            self.fold_logical_expr(tree, False)
             return 'boolean'
         raise Exception(f"Type error: Cannot perform 'and' on '{left_type}' and '{right_type}'")
 
     def eval_or_expr(self, tree):
-        left_type = self.eval_expr(tree.children[0])
-        right_type = self.eval_expr(tree.children[1])
+        left_type = yield tree.children[0]
+        right_type = yield tree.children[1]
         if left_type == 'boolean' and right_type == 'boolean':
+            self.fold_logical_expr(tree, True)
             return 'boolean'
         raise Exception(f"Type error: Cannot perform 'or' on '{left_type}' and '{right_type}'")
 
     def eval_not_expr(self, tree):
         expr = tree.children[0]
-        expr_type = self.eval_expr(expr)
+        expr_type = yield expr
         if expr_type != 'boolean':
             raise Exception(f"Cannot apply '!' ('not') to type '{expr_type}'")
-        
+
+        value = self.constant_of(expr)
+        if value is not None:
+            self.annotations.folded[id(tree)] = fold_unary('!', value)
         return 'boolean'
 
     def eval_rel_expr(self, tree):
-        left_type = self.eval_expr(tree.children[0])  
+        left_type = yield tree.children[0]
         operator = tree.children[1].data             # <, >, ==, !=
-        right_type = self.eval_expr(tree.children[2])  
+        right_type = yield tree.children[2]
 
         if left_type != right_type:
             raise Exception(f"Type error: Cannot compare '{left_type}' and '{right_type}'")
 
+        left_value = self.constant_of(tree.children[0])
+        right_value = self.constant_of(tree.children[2])
+        if left_value is not None and right_value is not None:
+            value = fold_relation(operator, left_value, right_value)
+            if value is not None:
+                self.annotations.folded[id(tree)] = value
         return 'boolean'
 
     def eval_paren_expr(self, tree):
-        return self.eval_expr(tree.children[0])
+        return (yield tree.children[0])
 
     def func_call_expr(self, tree):
         func_name = tree.children[0].value
-        args = tree.children[1].children if len(tree.children) > 1 else []
+        args = tree.children[1].children if tree.children[1] is not None else []
 
         if func_name not in self.function_table:
             raise Exception(f"Function '{func_name}' is not declared")
@@ -355,7 +372,7 @@ class SemanticAnalyzer(Visitor):
             raise Exception(f"Function '{func_name}' expects {len(expected_params)} arguments, but got {len(args)}")
 
         for i, (arg, (expected_type, _)) in enumerate(zip(args, expected_params)):
-            arg_type = self.eval_expr(arg)
+            arg_type = yield arg
             if arg_type != expected_type:
                 raise Exception(
                     f"Argument {i+1} of function '{func_name}' has incorrect type: "
@@ -399,7 +416,8 @@ class SemanticAnalyzer(Visitor):
                 
                 raise Exception(f"Can't assign {expr_type} to {var_type} at line {row} column {col}")
 
-            self.block_analyzer.declare_variable(var_name, var_type.replace("_type", ""))
+            symbol = self.block_analyzer.declare_variable(var_name, var_type.replace("_type", ""))
+            self.annotations.symbols[id(item)] = symbol
 
     def assign_stmt(self, tree):
         row , col = self.which_col_row(tree)
@@ -409,6 +427,7 @@ class SemanticAnalyzer(Visitor):
         var_type = self.block_analyzer.get_variable_type(var_name)
         if var_type == None:
             raise Exception(f"Variable {var_name} is not declared in current scope")
+        self.annotations.symbols[id(tree)] = self.block_analyzer.get_symbol(var_name)
 
         expr_type = self.eval_expr(expr)
         if expr_type != var_type:
@@ -426,6 +445,7 @@ class SemanticAnalyzer(Visitor):
 
         if var_type != 'int':
             raise Exception(f"Cannot decrement variable '{var_name}' of type '{var_type}'")
+        self.annotations.symbols[id(tree)] = self.block_analyzer.get_symbol(var_name)
 
     def incr_stmt(self, tree):
         var_name = tree.children[0].value
@@ -435,13 +455,17 @@ class SemanticAnalyzer(Visitor):
 
         if var_type != 'int':
             raise Exception(f"Cannot increment variable '{var_name}' of type '{var_type}'")
+        self.annotations.symbols[id(tree)] = self.block_analyzer.get_symbol(var_name)
 
     def neg_expr(self, tree):
         expr = tree.children[0]
-        expr_type = self.eval_expr(expr)
+        expr_type = yield expr
         if expr_type != 'int':
             raise Exception(f"Cannot apply negation to type '{expr_type}'")
-        
+
+        value = self.constant_of(expr)
+        if value is not None:
+            self.annotations.folded[id(tree)] = fold_unary('-', value)
         return 'int'
 
     def var_decl_with_expr(self, tree):
@@ -473,8 +497,11 @@ class SemanticAnalyzer(Visitor):
 
         self.block_analyzer.enter_block()
 
-        for param_type, param_name in params:
+        # Symbole parametrów w kolejności z sygnatury, backend nazywa nimi argumenty funkcji
+        self.annotations.symbols[id(tree)] = [
             self.block_analyzer.declare_variable(param_name, param_type)
+            for param_type, param_name in params
+        ]
 
         self.visit(block)
 
@@ -586,15 +613,26 @@ class SemanticAnalyzer(Visitor):
                 return self.check_returns(tree.children[0])
             elif tree.data == 'ret_stmt':
                 return True
+            elif tree.data in self.expr_handlers:
+                # Return nie może wystąpić wewnątrz wyrażenia, a schodzenie w głąb
+                # długich wyrażeń kosztowałoby głęboką rekurencję
+                return False
             elif tree.data == 'if_stmt':
-                if len(tree.children) == 2:
-                    # if bez else – może nie zwrócić
-                    return False
-                elif len(tree.children) == 3:
-                    # if z else – obie gałęzie muszą zwracać
-                    then_returns = self.check_returns(tree.children[1])
-                    else_returns = self.check_returns(tree.children[2])
-                    return then_returns and else_returns
+                # if bez else zwraca tylko wtedy, gdy warunek jest zawsze prawdziwy
+                if self.constant_of(tree.children[0]) is TRUE:
+                    return self.check_returns(tree.children[1])
+                return False
+            elif tree.data == 'if_else_stmt':
+                condition = self.constant_of(tree.children[0])
+                if condition is TRUE:
+                    return self.check_returns(tree.children[1])
+                if condition is FALSE:
+                    return self.check_returns(tree.children[2])
+                # obie gałęzie muszą zwracać
+                return self.check_returns(tree.children[1]) and self.check_returns(tree.children[2])
+            elif tree.data == 'while_stmt' and self.constant_of(tree.children[0]) is TRUE:
+                # while (true) nigdy nie kończy się normalnie
+                return True
             else:
                 for child in tree.children:
                     if self.check_returns(child):
@@ -605,8 +643,66 @@ class SemanticAnalyzer(Visitor):
 
 
 class LatteCompiler:
-    def __init__(self):
-        pass
-
-    def compile_program(self):
-        pass
\ No newline at end of file
+    def __init__(self, parser=None, cache=None, inline_threshold=None, passes=None):
+        if parser is None:
+            from src.LLVM_parser import get_parser
+            parser = get_parser()
+        self.parser = parser
+        self.cache = cache
+        # None oznacza domyślny próg inlinera z LLVM_inline i wszystkie przebiegi z LLVM_optimizer
+        self.inline_threshold = inline_threshold
+        self.passes = passes
+        # Liczniki przebiegów optymalizujących i wstawione wywołania z ostatniej
+        # kompilacji (puste przy trafieniu w cache)
+        self.stats = {}
+        self.inlined = []
+
+    def parse(self, code):
+        return self.parser.parse(code)
+
+    def check(self, tree):
+        SIG_analyzer = SygnatureAnalyzer()
+        SIG_analyzer.visit(tree)
+        SIG_analyzer.check_main()
+        function_table = SIG_analyzer.function_table
+
+        analyzer = SemanticAnalyzer(function_table)
+        analyzer.visit(tree)
+        return function_table, analyzer.annotations
+
+    def compile(self, code):
+        # Trafienie w cache pomija parsowanie, analizę semantyczną i generowanie kodu czwórkowego
+        if self.cache is not None:
+            entry = self.cache.get(code)
+            if entry is not None:
+                self.stats = {}
+                self.inlined = []
+                return entry
+
+        tree = self.parse(code)
+        function_table, annotations = self.check(tree)
+
+        # Backend importujemy dopiero tutaj, samo sprawdzanie programu go nie potrzebuje
+        from src.LLVM_backend import LLVM_QuadCode
+        from src.LLVM_creator import LLVM_Creator
+        from src.LLVM_optimizer import Optimizer
+        from src.LLVM_refcount import insert_refcounts
+        backend = LLVM_QuadCode(function_table, annotations)
+        backend.visit(tree)
+        optimizer = Optimizer(function_table=function_table)
+        if self.passes is not None:
+            optimizer.passes = self.passes
+        if self.inline_threshold is not None:
+            optimizer.inline_threshold = self.inline_threshold
+        # Liczniki referencji napisów dopisujemy przed optymalizacjami, które traktują je jak zwykłe wywołania
+        quadruples = optimizer.run(insert_refcounts(backend.get_instructions()))
+        self.stats = optimizer.stats
+        self.inlined = optimizer.inlined
+        llvm = LLVM_Creator(function_table).render_llvm(quadruples)
+
+        if self.cache is not None:
+            self.cache.put(code, quadruples, llvm)
+        return quadruples, llvm
+
+    def compile_program(self, code):
+        return self.compile(code)[0]
@@ -0,0 +1,154 @@
+from src.IRdataclasses import *
+from src.LLVM_cfg import rewrite_uses
+from src.LLVM_lvn import expression_key, equivalent_key
+from src.LLVM_refcount import RELEASE, retain
+from src.LLVM_ssa import compute_idom, dominator_tree
+
+# Globalna numeracja wartości po drzewie dominatorów: tablica wyrażeń jest
+# zakresowa, więc wynik policzony w bloku jest widoczny we wszystkich blokach,
+# które ten blok dominuje, i znika po wyjściu z jego poddrzewa.
+
+# Funkcje runtime'u bez efektów ubocznych, których wywołania można współdzielić.
+# Concat do nich nie należy: każde wywołanie daje nową referencję, którą kod
+# potem zwalnia (LLVM_refcount), więc nie wolno go przenosić ani usuwać.
+PURE_FUNCTIONS = frozenset()
+
+# Wywołania, które dają nową referencję na wartość zależną tylko od argumentów.
+# Powtórzone wywołanie zastępujemy zatrzymaniem poprzedniego wyniku (retainString),
+# o ile po drodze od niego nic nie mogło zwolnić jego referencji.
+SHARED_CALLS = frozenset({'Concat'})
+
+
+def value_key(instruction):
+    key = expression_key(instruction)
+    if key is not None:
+        return key
+    if isinstance(instruction, FunctionCall) and instruction.name in PURE_FUNCTIONS | SHARED_CALLS:
+        return ('call', instruction.name) + tuple(instruction.params)
+    if isinstance(instruction, Phi):
+        # Dwa phi w tym samym bloku z tymi samymi wejściami dają tę samą wartość
+        return ('phi',) + tuple(instruction.incoming)
+    return None
+
+
+def release_sites(cfg):
+    # wartość -> miejsca (blok, pozycja), w których może zostać zwolniona jej referencja:
+    # releaseString na niej samej albo na phi, które ją przenosi dalej
+    carried = {}
+    direct = {}
+    for block in cfg.blocks:
+        for position, instruction in enumerate(block.instructions):
+            if isinstance(instruction, Phi):
+                for _, value in instruction.incoming:
+                    carried.setdefault(value, set()).add(instruction.result)
+            elif isinstance(instruction, FunctionCall) and instruction.name == RELEASE:
+                direct.setdefault(instruction.params[0], []).append((block.index, position))
+
+    def sites(value):
+        found = []
+        seen = {value}
+        stack = [value]
+        while stack:
+            current = stack.pop()
+            found.extend(direct.get(current, ()))
+            for carrier in carried.get(current, ()):
+                if carrier not in seen:
+                    seen.add(carrier)
+                    stack.append(carrier)
+        return found
+    return sites
+
+
+def released_before(cfg, sites, definition, use):
+    # Czy z któregoś miejsca zwolnienia da się dojść do use, nie przechodząc przez
+    # definition (tam powstaje nowa wartość, więc dalej to już inny obiekt)
+    def_block, def_position = definition
+    use_block, use_position = use
+    for block, position in sites:
+        if block == use_block and position < use_position:
+            if not (block == def_block and position < def_position < use_position):
+                return True
+            continue
+        if block == def_block and position < def_position:
+            continue
+        visited = set()
+        stack = list(cfg.succ[block])
+        while stack:
+            index = stack.pop()
+            if index in visited:
+                continue
+            visited.add(index)
+            if index == use_block:
+                if not (index == def_block and def_position < use_position):
+                    return True
+                continue
+            if index != def_block:
+                stack.extend(cfg.succ[index])
+    return False
+
+
+def global_value_numbering(cfg):
+    idom = compute_idom(cfg)
+    children = dominator_tree(idom)
+    replacement = {}
+    sites = release_sites(cfg)
+    # Pozycje sprzed usuwania instrukcji, w których są też miejsca zwolnień
+    positions = {id(instruction): (block.index, position)
+                 for block in cfg.blocks for position, instruction in enumerate(block.instructions)}
+    defined = {}
+
+    def resolve(operand):
+        return replacement.get(operand, operand)
+
+    table = {}
+    removed = 0
+    walk = [(0, None)]
+    while walk:
+        index, inserted = walk.pop()
+        if inserted is not None:
+            # Wpis zasłonięty w poddrzewie (odrzucone współdzielenie wywołania) wraca
+            for key, hidden in reversed(inserted):
+                if hidden is None:
+                    del table[key]
+                else:
+                    table[key] = hidden
+            continue
+
+        block = cfg.blocks[index]
+        inserted = []
+        kept = []
+        for instruction in block.instructions:
+            rewrite_uses(instruction, resolve)
+            key = value_key(instruction)
+            if key is not None:
+                previous = table.get(key)
+                if previous is not None and isinstance(instruction, FunctionCall) and instruction.name in SHARED_CALLS:
+                    if released_before(cfg, sites(previous), defined[previous], positions[id(instruction)]):
+                        previous = None
+                    else:
+                        # Wywołujący dostaje własną referencję, tak jak z nowego wywołania
+                        kept.append(retain(previous))
+                if previous is not None:
+                    replacement[instruction.result] = previous
+                    removed += 1
+                    continue
+                inserted.append((key, table.get(key)))
+                table[key] = instruction.result
+                defined[instruction.result] = positions[id(instruction)]
+                alternative = equivalent_key(key)
+                if alternative is not None and alternative not in table:
+                    table[alternative] = instruction.result
+                    inserted.append((alternative, None))
+            kept.append(instruction)
+        block.instructions = kept
+
+        walk.append((index, inserted))
+        for child in reversed(children[index]):
+            walk.append((child, None))
+
+    # Phi czytają wartości z krawędzi powrotnych, które mogły zostać podmienione później
+    if replacement:
+        for block in cfg.blocks:
+            for instruction in block.instructions:
+                rewrite_uses(instruction, resolve)
+    return removed
@@ -0,0 +1,203 @@
+from dataclasses import dataclass, replace
+
+from src.IRdataclasses import *
+from src.IRoperands import Temp, Var, Undef, LabelRef, BLOCK_START, BLOCK_END
+from src.LLVM_cfg import CONTROL_OPERATORS, falls_through, rewrite_uses
+from src.LLVM_ssa import max_temp_index
+from src.LLVM_symbols import Symbol
+
+# Wstawianie ciał małych funkcji w miejsce wywołań, na kodzie czwórkowym przed
+# budową grafu. Graf wywołań obejmuje funkcje z tablicy SygnatureAnalyzer, które
+# mają ciało (predefiniowane go nie mają). Kopia ciała dostaje nowe rejestry,
+# etykiety i symbole zmiennych, parametry stają się przypisaniami argumentów,
+# a return przypisaniem do rejestru wyniku i skokiem za wstawiony kod.
+# Funkcje przetwarzamy od liści grafu, więc koszt wywoływanej funkcji liczymy
+# już po wstawieniu do niej jej własnych wywołań.
+
+INLINE_THRESHOLD = 16
+
+
+@dataclass(slots=True)
+class InlinedCall:
+    caller: str
+    callee: str
+    cost: int
+
+
+def split_functions(quadruples):
+    # nazwa -> (definicja, ciało) w kolejności z programu
+    functions = {}
+    definition = None
+    body = []
+    for instruction in quadruples:
+        if isinstance(instruction, FunctionDefinition):
+            definition = instruction
+            body = []
+        elif isinstance(instruction, EndFunction):
+            functions[definition.name] = (definition, body)
+            definition = None
+        elif definition is not None:
+            body.append(instruction)
+    return functions
+
+
+def call_graph(function_table, functions):
+    graph = {}
+    for name in function_table:
+        if name not in functions:
+            continue
+        _, body = functions[name]
+        graph[name] = {instruction.name for instruction in body
+                       if isinstance(instruction, FunctionCall) and instruction.name in functions}
+    return graph
+
+
+def recursive_functions(graph):
+    # Funkcje, z których da się wrócić do siebie (także przez inne funkcje)
+    recursive = set()
+    for name in graph:
+        seen = set()
+        stack = list(graph[name])
+        while stack:
+            callee = stack.pop()
+            if callee == name:
+                recursive.add(name)
+                break
+            if callee not in seen:
+                seen.add(callee)
+                stack.extend(graph[callee])
+    return recursive
+
+
+def bottom_up(graph):
+    # Postorder grafu wywołań: wywoływane przed wywołującymi
+    order = []
+    visited = set()
+    for root in graph:
+        if root in visited:
+            continue
+        visited.add(root)
+        stack = [(root, iter(graph[root]))]
+        while stack:
+            name, callees = stack[-1]
+            for callee in callees:
+                if callee not in visited:
+                    visited.add(callee)
+                    stack.append((callee, iter(graph[callee])))
+                    break
+            else:
+                stack.pop()
+                order.append(name)
+    return order
+
+
+def falls_off(body):
+    # Czy ostatnia instrukcja ciała (poza znacznikami bloków) przechodzi dalej, za koniec funkcji
+    instructions = [instruction for instruction in body
+                    if not (isinstance(instruction, Label) and instruction.name in (BLOCK_START, BLOCK_END))]
+    return not instructions or falls_through(instructions[-1])
+
+
+def inline_cost(body):
+    # Etykiety i znaczniki bloków nic nie kosztują
+    return sum(1 for instruction in body if not isinstance(instruction, Label))
+
+
+class Inliner:
+    def __init__(self, next_temp, threshold=INLINE_THRESHOLD):
+        self.next_temp = next_temp
+        self.threshold = threshold
+        self.sites = 0
+        self.inlined = []
+
+    def run(self, quadruples, function_table):
+        functions = split_functions(quadruples)
+        graph = call_graph(function_table, functions)
+        recursive = recursive_functions(graph)
+        costs = {}
+        for name in bottom_up(graph):
+            definition, body = functions[name]
+            expanded = []
+            for instruction in body:
+                callee = instruction.name if isinstance(instruction, FunctionCall) else None
+                if callee in graph and callee not in recursive and costs[callee] <= self.threshold:
+                    self.inlined.append(InlinedCall(name, callee, costs[callee]))
+                    expanded.extend(self.expand(instruction, functions[callee], function_table[callee]))
+                else:
+                    expanded.append(instruction)
+            functions[name] = (definition, expanded)
+            costs[name] = inline_cost(expanded)
+
+        result = []
+        for definition, body in functions.values():
+            result.append(definition)
+            result.extend(body)
+            result.append(EndFunction(name=definition.name))
+        return result
+
+    def expand(self, call, callee, signature):
+        definition, body = callee
+        self.sites += 1
+        suffix = f"_i{self.sites}"
+        operands = {}
+        labels = {}
+
+        def operand(value):
+            if isinstance(value, Temp):
+                if value not in operands:
+                    operands[value] = Temp(self.next_temp, value.type)
+                    self.next_temp += 1
+                return operands[value]
+            if isinstance(value, Var):
+                if value not in operands:
+                    symbol = value.symbol
+                    operands[value] = Var(Symbol(symbol.name, symbol.type, symbol.unique + suffix, symbol.scope_id))
+                return operands[value]
+            return value
+
+        def label(value):
+            if value is BLOCK_START or value is BLOCK_END:
+                return value
+            if value not in labels:
+                labels[value] = LabelRef(value.name + suffix)
+            return labels[value]
+
+        end = label(LabelRef(f"{definition.name}_end"))
+        expanded = [Assignment(variable=operand(param), value=argument)
+                    for param, argument in zip(definition.params or [], call.params)]
+        for instruction in body:
+            if isinstance(instruction, ReturnStatement):
+                if instruction.value is not None and call.result is not None and signature['return_type'] != 'void':
+                    expanded.append(Assignment(variable=call.result, value=operand(instruction.value)))
+                expanded.append(Jump(target=end))
+                continue
+
+            copied = replace(instruction)
+            rewrite_uses(copied, operand)
+            if isinstance(copied, (BinaryOperation, UnaryOperation, FunctionCall)):
+                if copied.result is not None:
+                    copied.result = operand(copied.result)
+            elif isinstance(copied, LogicalOperation):
+                if copied.operator in CONTROL_OPERATORS:
+                    copied.result = label(copied.result)
+                else:
+                    copied.result = operand(copied.result)
+            elif isinstance(copied, Assignment):
+                copied.variable = operand(copied.variable)
+            elif isinstance(copied, Label):
+                copied.name = label(copied.name)
+            elif isinstance(copied, (Jump, ConditionalJump)):
+                copied.target = label(copied.target)
+            expanded.append(copied)
+        # Funkcja z wynikiem nie dochodzi do końca ciała bez return (pilnuje tego analiza
+        # semantyczna), więc ta ścieżka jest martwa, jak unreachable w samodzielnej kopii
+        if call.result is not None and signature['return_type'] != 'void' and falls_off(body):
+            expanded.append(Assignment(variable=call.result, value=Undef(call.result.type)))
+        expanded.append(Label(name=end))
+        return expanded
+
+
+def inline_calls(quadruples, function_table, threshold=INLINE_THRESHOLD):
+    # Zwraca (nowe czwórki, lista wstawionych wywołań)
+    inliner = Inliner(max_temp_index(quadruples) + 1, threshold)
+    return inliner.run(quadruples, function_table), inliner.inlined
@@ -0,0 +1,162 @@
+from src.IRdataclasses import *
+from src.IRoperands import Const
+from src.LLVM_cfg import instruction_def, rewrite_uses
+from src.LLVM_fold import fold_instruction
+from src.LLVM_licm import loop_nests, loop_preheader, enclose_preheader, definition_blocks, append_before_terminator
+
+# Zmienne indukcyjne i redukcja mocy (na postaci SSA). Podstawowa zmienna
+# indukcyjna to phi w nagłówku pętli postaci i = phi(init, i ± krok) ze stałym
+# w pętli krokiem (tak wygląda i++ i i--). Iloczyn i * k (k niezmiennik) zastępuje
+# nowa zmienna s = phi(init * k, s ± krok * k), a i * i dwie: s = phi(init², s + e)
+# oraz e = phi(2·krok·init + krok², e + 2·krok²), więc w pętli zostają same dodawania.
+# Arytmetyka i32 zawija się modulo 2^32, więc tożsamości zachodzą także przy przepełnieniu.
+# Jeśli i było potrzebne tylko do mnożenia, jego phi i aktualizacja zostają martwe
+# i usuwa je DCE.
+
+ZERO = Const(0, 'int')
+
+
+def induction_step(phi, body, definitions, defined):
+    # (operator, krok, etykieta bloku z krawędzią powrotną) albo None
+    if phi.result.type != 'int':
+        return None
+    inside = [(label, value) for label, value in phi.incoming if label in body]
+    if len(inside) != 1 or len(inside) == len(phi.incoming):
+        return None
+    latch, value = inside[0]
+    update = definitions.get(value)
+    if not isinstance(update, BinaryOperation):
+        return None
+
+    if update.operator == 'plus_op' and update.left is phi.result:
+        step = update.right
+    elif update.operator == 'plus_op' and update.right is phi.result:
+        step = update.left
+    elif update.operator == 'minus_op' and update.left is phi.result:
+        step = update.right
+    else:
+        return None
+    if not isinstance(step, Const) and defined.get(step) in body:
+        return None
+    return update.operator, step, latch
+
+
+def strength_reduction(cfg, new_temp):
+    nests = loop_nests(cfg)
+    defined = definition_blocks(cfg)
+    replacement = {}
+    reduced = 0
+
+    def resolve(operand):
+        return replacement.get(operand, operand)
+
+    for position, labels in enumerate(nests):
+        body = set(labels)
+        by_label = {block.label: block for block in cfg.blocks}
+        header = by_label[labels[0]]
+        definitions = {}
+        for label in labels:
+            for instruction in by_label[label].instructions:
+                result = instruction_def(instruction)
+                if result is not None:
+                    definitions[result] = instruction
+
+        inductions = {}
+        for instruction in header.instructions:
+            if isinstance(instruction, Phi):
+                step = induction_step(instruction, body, definitions, defined)
+                if step is not None:
+                    inductions[instruction.result] = (instruction,) + step
+        if not inductions:
+            continue
+
+        def invariant(operand):
+            return isinstance(operand, Const) or defined.get(operand) not in body
+
+        candidates = []
+        for label in labels:
+            for instruction in by_label[label].instructions:
+                if isinstance(instruction, BinaryOperation) and instruction.operator == 'times_op':
+                    candidates.append(instruction)
+        if not any(instruction.left in inductions or instruction.right in inductions for instruction in candidates):
+            continue
+
+        preheader, inserted = loop_preheader(cfg, header, body, new_temp)
+        if inserted:
+            enclose_preheader(nests, position, preheader)
+        setup = []
+        phis = []
+        updates = {}
+        derived = {}
+
+        def emit(operator, left, right):
+            # Początki i kroki to najczęściej stałe (i = 0, i++), więc zwijamy je od razu
+            if operator == 'times_op' and (left is ZERO or right is ZERO):
+                return ZERO
+            instruction = BinaryOperation(left=left, operator=operator, right=right, result=new_temp('int'))
+            folded = fold_instruction(instruction)
+            if folded is not None:
+                return folded
+            setup.append(instruction)
+            defined[instruction.result] = preheader.label
+            return instruction.result
+
+        def new_induction(init, operator, step, latch):
+            result = new_temp('int')
+            following = new_temp('int')
+            phis.append(Phi(result=result, incoming=[(preheader.label, init), (latch, following)]))
+            updates.setdefault(latch, []).append(
+                BinaryOperation(left=result, operator=operator, right=step, result=following))
+            defined[result] = header.label
+            defined[following] = latch
+            return result
+
+        def initial(phi):
+            return next(value for label, value in phi.incoming if label == preheader.label)
+
+        removed = set()
+        for instruction in candidates:
+            left, right = resolve(instruction.left), resolve(instruction.right)
+            if right in inductions and left not in inductions:
+                left, right = right, left
+            if left not in inductions or not (right is left or invariant(right)):
+                continue
+
+            key = (left, right)
+            if key not in derived:
+                phi, operator, step, latch = inductions[left]
+                init = initial(phi)
+                if right is left:
+                    # (i ± c)² = i² + e, gdzie e = ±2ci + c² rośnie co obrót o 2c²
+                    double = emit('plus_op', step, step)
+                    square = emit('times_op', step, step)
+                    scaled = emit('times_op', double, init)
+                    if operator == 'plus_op':
+                        start = emit('plus_op', scaled, square)
+                    else:
+                        start = emit('minus_op', square, scaled)
+                    difference = new_induction(start, 'plus_op', emit('times_op', double, step), latch)
+                    derived[key] = new_induction(emit('times_op', init, init), 'plus_op', difference, latch)
+                else:
+                    scaled_step = emit('times_op', step, right)
+                    result = new_induction(emit('times_op', init, right), operator, scaled_step, latch)
+                    # Nowa zmienna też jest indukcyjna, więc jej iloczyny redukujemy dalej
+                    inductions[result] = (phis[-1], operator, scaled_step, latch)
+                    derived[key] = result
+            replacement[instruction.result] = derived[key]
+            removed.add(id(instruction))
+            reduced += 1
+
+        append_before_terminator(preheader, setup)
+        header.instructions[0:0] = phis
+        for latch, instructions in updates.items():
+            append_before_terminator(by_label[latch], instructions)
+        for label in labels:
+            block = by_label[label]
+            block.instructions = [instruction for instruction in block.instructions if id(instruction) not in removed]
+
+    if replacement:
+        for block in cfg.blocks:
+            for instruction in block.instructions:
+                rewrite_uses(instruction, resolve)
+    return reduced
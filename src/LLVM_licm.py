@@ -0,0 +1,174 @@
+from src.IRdataclasses import *
+from src.LLVM_cfg import BasicBlock, branch_targets, falls_through, instruction_uses, instruction_def
+from src.LLVM_dce import is_pure, retarget
+from src.LLVM_gvn import PURE_FUNCTIONS
+from src.LLVM_ssa import compute_idom, dominates, reverse_postorder
+
+# Wyciąganie niezmienników z pętli (na postaci SSA). Pętla naturalna to nagłówek
+# plus bloki, z których da się dojść do krawędzi powrotnej bez przechodzenia
+# przez nagłówek. Przed nagłówkiem wstawiamy preheader i przenosimy do niego
+# czyste instrukcje, których operandy są zdefiniowane poza pętlą. Instrukcja
+# może wtedy wykonać się, nawet gdy pętla nie wykona ani jednego obrotu,
+# więc przenosimy tylko takie, które nie mogą przerwać programu.
+
+
+def pure_functions(functions):
+    # Funkcje użytkownika bez efektów ubocznych, które zawsze się kończą: bez pętli,
+    # rekurencji, dzielenia przez nieznany dzielnik i wywołań spoza tego zbioru
+    candidates = {}
+    for cfg in functions:
+        callees = set()
+        simple = True
+        for block in cfg.blocks:
+            if any(successor <= block.index for successor in cfg.succ[block.index]):
+                simple = False
+            for instruction in block.instructions:
+                if isinstance(instruction, FunctionCall):
+                    callees.add(instruction.name)
+                elif isinstance(instruction, BinaryOperation) and not is_pure(instruction):
+                    simple = False
+        if simple:
+            candidates[cfg.name] = callees - PURE_FUNCTIONS
+
+    pure = set(PURE_FUNCTIONS)
+    changed = True
+    while changed:
+        changed = False
+        for name, callees in candidates.items():
+            if name not in pure and callees <= pure:
+                pure.add(name)
+                changed = True
+    return frozenset(pure)
+
+
+def natural_loops(cfg, idom):
+    # indeks nagłówka -> zbiór indeksów bloków pętli; pętle o wspólnym nagłówku łączymy
+    loops = {}
+    for index, successors in enumerate(cfg.succ):
+        if idom[index] is None:
+            continue
+        for header in successors:
+            if not dominates(idom, header, index):
+                continue
+            body = loops.setdefault(header, {header})
+            stack = [index]
+            while stack:
+                node = stack.pop()
+                if node not in body:
+                    body.add(node)
+                    stack.extend(pred for pred in cfg.pred[node] if idom[pred] is not None)
+    return loops
+
+
+def hoistable(instruction, pure):
+    if isinstance(instruction, FunctionCall):
+        return instruction.result is not None and instruction.name in pure
+    return not isinstance(instruction, Phi) and instruction_def(instruction) is not None and is_pure(instruction)
+
+
+def insert_preheader(cfg, header, body, new_temp):
+    preheader = BasicBlock(header.index, cfg.new_label())
+    outside = [cfg.blocks[pred] for pred in cfg.pred[header.index] if cfg.blocks[pred].label not in body]
+    for block in outside:
+        if block.instructions and header.label in branch_targets(block.instructions[-1]):
+            retarget(block.instructions[-1], preheader.label)
+
+    # Blok pętli leżący tuż przed nagłówkiem wpadałby teraz do preheadera
+    previous = cfg.blocks[header.index - 1]
+    if previous.label in body and falls_through(previous.instructions[-1] if previous.instructions else None):
+        previous.instructions.append(Jump(target=header.label))
+
+    # Wejścia phi spoza pętli przychodzą teraz z preheadera
+    labels = {block.label for block in outside}
+    for instruction in header.instructions:
+        if not isinstance(instruction, Phi):
+            continue
+        entering = [(label, value) for label, value in instruction.incoming if label in labels]
+        inside = [(label, value) for label, value in instruction.incoming if label not in labels]
+        values = {value for _, value in entering}
+        if len(values) == 1:
+            value = values.pop()
+        else:
+            value = new_temp(instruction.result.type)
+            preheader.instructions.append(Phi(result=value, incoming=entering))
+        instruction.incoming = inside + [(preheader.label, value)]
+
+    cfg.blocks.insert(header.index, preheader)
+    cfg.compute_edges()
+    return preheader
+
+
+def loop_preheader(cfg, header, body, new_temp):
+    # (preheader, czy_nowy): jedyny poprzednik spoza pętli, który prowadzi tylko do nagłówka,
+    # już jest preheaderem; w przeciwnym razie wstawiamy nowy blok
+    outside = [pred for pred in cfg.pred[header.index] if cfg.blocks[pred].label not in body]
+    if len(outside) == 1 and cfg.succ[outside[0]] == [header.index]:
+        return cfg.blocks[outside[0]], False
+    return insert_preheader(cfg, header, body, new_temp), True
+
+
+def append_before_terminator(block, instructions):
+    position = len(block.instructions) - (1 if block.terminator() is not None else 0)
+    block.instructions[position:position] = instructions
+
+
+def loop_nests(cfg):
+    # Pętle jako listy etykiet w odwrotnym porządku postorder (nagłówek pierwszy),
+    # bo wstawianie preheaderów przenumerowuje bloki. Wewnętrzne pętle idą pierwsze,
+    # żeby to, co z nich wyciągniemy, mogło potem wyjść także z pętli zewnętrznych.
+    loops = natural_loops(cfg, compute_idom(cfg))
+    order = reverse_postorder(cfg)
+    return sorted(([cfg.blocks[index].label for index in order if index in body] for body in loops.values()),
+                  key=len)
+
+
+def enclose_preheader(nests, position, preheader):
+    # Preheader należy do pętli, które obejmują pętlę nests[position]
+    header = nests[position][0]
+    for outer in nests[position + 1:]:
+        if header in outer:
+            outer.insert(outer.index(header), preheader.label)
+
+
+def definition_blocks(cfg):
+    defined = {}
+    for block in cfg.blocks:
+        for instruction in block.instructions:
+            result = instruction_def(instruction)
+            if result is not None:
+                defined[result] = block.label
+    return defined
+
+
+def loop_invariant_code_motion(cfg, pure, new_temp):
+    nests = loop_nests(cfg)
+    defined = definition_blocks(cfg)
+    hoisted = 0
+    for position, labels in enumerate(nests):
+        body = set(labels)
+        by_label = {block.label: block for block in cfg.blocks}
+        invariant = []
+        for label in labels:
+            block = by_label[label]
+            kept = []
+            for instruction in block.instructions:
+                if hoistable(instruction, pure) and all(defined.get(operand) not in body
+                                                        for operand in instruction_uses(instruction)):
+                    invariant.append(instruction)
+                    defined[instruction_def(instruction)] = None
+                else:
+                    kept.append(instruction)
+            block.instructions = kept
+        if not invariant:
+            continue
+
+        preheader, inserted = loop_preheader(cfg, by_label[labels[0]], body, new_temp)
+        append_before_terminator(preheader, invariant)
+        for instruction in preheader.instructions:
+            result = instruction_def(instruction)
+            if result is not None:
+                defined[result] = preheader.label
+        if inserted:
+            enclose_preheader(nests, position, preheader)
+        hoisted += len(invariant)
+    return hoisted
@@ -0,0 +1,67 @@
+from src.IRdataclasses import *
+from src.LLVM_cfg import CONTROL_OPERATORS, rewrite_uses
+
+# Lokalna numeracja wartości w obrębie bloku podstawowego. W postaci SSA operand
+# jest swoim własnym numerem wartości (obiekty są internowane i nikt ich nie
+# nadpisuje), więc wystarczy słownik (operator, lewy, prawy) -> wynik.
+
+COMMUTATIVE = frozenset({'plus_op', 'times_op', 'eq_op', 'ne_op'})
+SWAPPED = {'lt_op': 'gt_op', 'gt_op': 'lt_op', 'le_op': 'ge_op', 'ge_op': 'le_op'}
+
+
+def expression_key(instruction):
+    # Klucz czystego wyrażenia albo None dla instrukcji z efektami ubocznymi
+    if isinstance(instruction, BinaryOperation):
+        return (instruction.operator, instruction.left, instruction.right)
+    if isinstance(instruction, UnaryOperation):
+        return (instruction.operator, instruction.operand)
+    if isinstance(instruction, LogicalOperation) and instruction.operator not in CONTROL_OPERATORS:
+        return (instruction.operator, instruction.left, instruction.right)
+    return None
+
+
+def equivalent_key(key):
+    # a+b == b+a, a<b == b>a
+    if len(key) != 3:
+        return None
+    operator, left, right = key
+    if operator in COMMUTATIVE:
+        return (operator, right, left)
+    if operator in SWAPPED:
+        return (SWAPPED[operator], right, left)
+    return None
+
+
+def local_value_numbering(cfg):
+    replacement = {}
+
+    def resolve(operand):
+        return replacement.get(operand, operand)
+
+    removed = 0
+    for block in cfg.blocks:
+        table = {}
+        kept = []
+        for instruction in block.instructions:
+            if replacement:
+                rewrite_uses(instruction, resolve)
+            key = expression_key(instruction)
+            if key is not None:
+                previous = table.get(key)
+                if previous is not None:
+                    replacement[instruction.result] = previous
+                    removed += 1
+                    continue
+                table[key] = instruction.result
+                alternative = equivalent_key(key)
+                if alternative is not None:
+                    table.setdefault(alternative, instruction.result)
+            kept.append(instruction)
+        block.instructions = kept
+
+    # Wyniki z tego bloku mogą być używane w blokach przez niego zdominowanych
+    if replacement:
+        for block in cfg.blocks:
+            for instruction in block.instructions:
+                rewrite_uses(instruction, resolve)
+    return removed
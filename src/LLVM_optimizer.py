@@ -0,0 +1,66 @@
+from src.LLVM_cfg import build_cfg, flatten
+from src.LLVM_ssa import SSABuilder, max_temp_index
+from src.LLVM_inline import INLINE_THRESHOLD, inline_calls
+from src.LLVM_tailcall import eliminate_tail_calls, mark_tail_calls
+from src.LLVM_copyprop import copy_propagation, coalesce_temps
+from src.LLVM_fold import fold_constants
+from src.LLVM_lvn import local_value_numbering
+from src.LLVM_gvn import global_value_numbering
+from src.LLVM_licm import pure_functions, loop_invariant_code_motion
+from src.LLVM_iv import strength_reduction
+from src.LLVM_dce import dead_code_elimination
+
+PASSES = ('inline', 'tailcall', 'copyprop', 'fold', 'lvn', 'licm', 'iv', 'gvn', 'dce')
+
+
+class Optimizer:
+    # Kolejne przebiegi na grafie przepływu sterowania każdej funkcji;
+    # stats zbiera liczniki z przebiegów (co zwinięto, co usunięto), a inlined
+    # wstawione wywołania. Inliner potrzebuje tablicy funkcji z SygnatureAnalyzer.
+    def __init__(self, passes=PASSES, function_table=None, inline_threshold=INLINE_THRESHOLD):
+        self.passes = passes
+        self.function_table = function_table
+        self.inline_threshold = inline_threshold
+        self.stats = {}
+        self.inlined = []
+
+    def count(self, name, amount):
+        self.stats[name] = self.stats.get(name, 0) + amount
+
+    def run(self, quadruples):
+        if 'inline' in self.passes and self.function_table is not None:
+            quadruples, self.inlined = inline_calls(quadruples, self.function_table, self.inline_threshold)
+            self.count('inline', len(self.inlined))
+        functions = build_cfg(quadruples)
+        ssa = SSABuilder(max_temp_index(quadruples) + 1)
+        pure = pure_functions(functions) if 'licm' in self.passes else None
+        for cfg in functions:
+            if 'tailcall' in self.passes:
+                self.count('tailcall', eliminate_tail_calls(cfg, ssa.new_temp))
+            # Propagacja kopii działa na zmiennych, więc jeszcze przed SSA
+            if 'copyprop' in self.passes:
+                self.count('copyprop', copy_propagation(cfg))
+                self.count('coalesce', coalesce_temps(cfg))
+            ssa.run(cfg)
+            if 'fold' in self.passes:
+                self.count('fold', fold_constants(cfg))
+            if 'lvn' in self.passes:
+                self.count('lvn', local_value_numbering(cfg))
+            if 'licm' in self.passes:
+                self.count('licm', loop_invariant_code_motion(cfg, pure, ssa.new_temp))
+            if 'iv' in self.passes:
+                self.count('iv', strength_reduction(cfg, ssa.new_temp))
+            if 'gvn' in self.passes:
+                self.count('gvn', global_value_numbering(cfg))
+            if 'dce' in self.passes:
+                removed, removed_blocks = dead_code_elimination(cfg)
+                self.count('dce', removed)
+                self.count('unreachable', removed_blocks)
+            if 'tailcall' in self.passes:
+                self.count('tail', mark_tail_calls(cfg, self.function_table))
+        self.count('phis', ssa.phis_placed - ssa.phis_removed)
+        return flatten(functions)
+
+
+def optimize(quadruples, passes=PASSES, function_table=None):
+    return Optimizer(passes, function_table).run(quadruples)
@@ -0,0 +1,33 @@
+import os
+from lark import Lark
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+GRAMMAR_PATH = os.path.join(SRC_DIR, 'grammar.lark')
+CACHE_PATH = os.path.join(SRC_DIR, '__pycache__', 'grammar.lalr')
+
+_parsers = {}
+
+
+def load_grammar(grammar_path=GRAMMAR_PATH):
+    with open(grammar_path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def get_parser(grammar_path=GRAMMAR_PATH, cache_path=CACHE_PATH):
+    # Lark zapisuje w pliku cache hash gramatyki, więc tablice LALR
+    # są budowane od nowa tylko wtedy, gdy grammar.lark się zmieni
+    key = (grammar_path, cache_path)
+    if key not in _parsers:
+        grammar = load_grammar(grammar_path)
+        if cache_path is None:
+            _parsers[key] = Lark(grammar, parser='lalr', start='start')
+        else:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            _parsers[key] = Lark(grammar, parser='lalr', start='start', cache=cache_path)
+    return _parsers[key]
+
+
+def clear_cache(cache_path=CACHE_PATH):
+    _parsers.clear()
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
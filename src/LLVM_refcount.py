@@ -0,0 +1,104 @@
+from src.IRdataclasses import *
+from src.IRoperands import Const, Temp, BLOCK_START, BLOCK_END
+from src.LLVM_cfg import instruction_uses, instruction_def
+
+# Zliczanie referencji napisów, dopisywane do kodu czwórkowego przed optymalizacjami.
+# Zmienna typu string jest właścicielem jednej referencji: przypisanie zatrzymuje
+# nową wartość i zwalnia starą, a wyjście z bloku (i return) zwalnia zmienne w nim
+# zadeklarowane. Wynik wywołania zwracającego string to nowa referencja w rejestrze
+# tymczasowym; przypisanie albo return ją przejmuje, w przeciwnym razie zwalniamy
+# ją zaraz po ostatnim użyciu. Parametry funkcja zatrzymuje na wejściu i zwalnia
+# przy wyjściu, więc wywołujący przekazuje napis bez zmiany licznika. Literały są
+# statyczne, więc dla stałych nie trzeba nic wywoływać.
+
+RETAIN = 'retainString'
+RELEASE = 'releaseString'
+
+
+def is_string(operand):
+    return operand is not None and operand.type == 'string' and not isinstance(operand, Const)
+
+
+def retain(value):
+    return FunctionCall(name=RETAIN, params=[value], result=None)
+
+
+def release(value):
+    return FunctionCall(name=RELEASE, params=[value], result=None)
+
+
+def last_uses(quadruples):
+    # rejestr typu string -> pozycja instrukcji, która czyta go ostatnia
+    last = {}
+    for position, instruction in enumerate(quadruples):
+        for operand in instruction_uses(instruction):
+            if isinstance(operand, Temp) and operand.type == 'string':
+                last[operand] = position
+    return last
+
+
+def insert_refcounts(quadruples):
+    last = last_uses(quadruples)
+    result = []
+    scopes = []
+    declared = set()
+
+    def release_scopes(count):
+        for scope in reversed(scopes[len(scopes) - count:]):
+            result.extend(release(variable) for variable in reversed(scope))
+
+    def take(value, position):
+        # Przypisanie i return przejmują referencję z rejestru, który nie będzie już czytany
+        if isinstance(value, Temp) and last.get(value) == position:
+            return
+        if is_string(value):
+            result.append(retain(value))
+
+    for position, instruction in enumerate(quadruples):
+        if isinstance(instruction, FunctionDefinition):
+            params = [param for param in instruction.params or [] if param.type == 'string']
+            result.append(instruction)
+            result.extend(retain(param) for param in params)
+            scopes = [params]
+            declared = set(params)
+            continue
+        if isinstance(instruction, EndFunction):
+            release_scopes(len(scopes))
+            result.append(instruction)
+            scopes = []
+            continue
+        if isinstance(instruction, Label) and instruction.name is BLOCK_START:
+            scopes.append([])
+            result.append(instruction)
+            continue
+        if isinstance(instruction, Label) and instruction.name is BLOCK_END:
+            release_scopes(1)
+            scopes.pop()
+            result.append(instruction)
+            continue
+
+        if isinstance(instruction, Assignment) and is_string(instruction.variable):
+            variable = instruction.variable
+            take(instruction.value, position)
+            # Pierwsze przypisanie to deklaracja, przed nią zmienna nie ma wartości
+            if variable in declared:
+                result.append(release(variable))
+            else:
+                declared.add(variable)
+                scopes[-1].append(variable)
+            result.append(instruction)
+            continue
+        if isinstance(instruction, ReturnStatement):
+            take(instruction.value, position)
+            release_scopes(len(scopes))
+            result.append(instruction)
+            continue
+
+        result.append(instruction)
+        for operand in dict.fromkeys(instruction_uses(instruction)):
+            if isinstance(operand, Temp) and operand.type == 'string' and last[operand] == position:
+                result.append(release(operand))
+        defined = instruction_def(instruction)
+        if isinstance(defined, Temp) and defined.type == 'string' and defined not in last:
+            result.append(release(defined))
+    return result
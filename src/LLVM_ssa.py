@@ -0,0 +1,289 @@
+from src.IRdataclasses import *
+from src.IRoperands import Temp, Var
+from src.LLVM_cfg import build_cfg, flatten, instruction_uses, instruction_def, rewrite_uses
+
+# Przejście do postaci SSA (mem2reg): dominatory metodą Coopera-Harveya-Kennedy'ego,
+# phi na iterowanych granicach dominacji (tylko tam, gdzie zmienna jest żywa),
+# potem przemianowanie w kolejności drzewa dominatorów. Przypisania x = v znikają:
+# kolejne użycia x dostają bezpośrednio v, więc w wyniku nie ma już Assignment.
+
+
+def reverse_postorder(cfg):
+    visited = [False] * len(cfg.blocks)
+    order = []
+    visited[0] = True
+    stack = [(0, iter(cfg.succ[0]))]
+    while stack:
+        index, successors = stack[-1]
+        for successor in successors:
+            if not visited[successor]:
+                visited[successor] = True
+                stack.append((successor, iter(cfg.succ[successor])))
+                break
+        else:
+            stack.pop()
+            order.append(index)
+    order.reverse()
+    return order
+
+
+def compute_idom(cfg, order=None):
+    if order is None:
+        order = reverse_postorder(cfg)
+    position = [None] * len(cfg.blocks)
+    for number, index in enumerate(order):
+        position[index] = number
+
+    idom = [None] * len(cfg.blocks)
+    idom[0] = 0
+    changed = True
+    while changed:
+        changed = False
+        for index in order[1:]:
+            new_idom = None
+            for pred in cfg.pred[index]:
+                if idom[pred] is None:
+                    continue
+                if new_idom is None:
+                    new_idom = pred
+                    continue
+                # Przecięcie ścieżek w drzewie dominatorów
+                finger1, finger2 = pred, new_idom
+                while finger1 != finger2:
+                    while position[finger1] > position[finger2]:
+                        finger1 = idom[finger1]
+                    while position[finger2] > position[finger1]:
+                        finger2 = idom[finger2]
+                new_idom = finger1
+            if idom[index] != new_idom:
+                idom[index] = new_idom
+                changed = True
+    return idom
+
+
+def dominator_tree(idom):
+    children = [[] for _ in idom]
+    for index, parent in enumerate(idom):
+        if index != 0 and parent is not None:
+            children[parent].append(index)
+    return children
+
+
+def dominance_frontiers(cfg, idom):
+    frontiers = [set() for _ in cfg.blocks]
+    for index, preds in enumerate(cfg.pred):
+        if len(preds) < 2 or idom[index] is None:
+            continue
+        for pred in preds:
+            runner = pred
+            while runner != idom[index] and idom[runner] is not None:
+                frontiers[runner].add(index)
+                runner = idom[runner]
+    return frontiers
+
+
+def dominates(idom, a, b):
+    while b != a:
+        if b == 0 or idom[b] is None:
+            return False
+        b = idom[b]
+    return True
+
+
+def max_temp_index(quadruples):
+    highest = 0
+    for instruction in quadruples:
+        result = instruction_def(instruction)
+        if isinstance(result, Temp) and result.index > highest:
+            highest = result.index
+    return highest
+
+
+class SSABuilder:
+    def __init__(self, next_temp):
+        self.next_temp = next_temp
+        self.phis_placed = 0
+        self.phis_removed = 0
+
+    def new_temp(self, var_type):
+        temp = Temp(self.next_temp, var_type)
+        self.next_temp += 1
+        return temp
+
+    def run(self, cfg):
+        cfg.remove_unreachable()
+        idom = compute_idom(cfg)
+        children = dominator_tree(idom)
+        frontiers = dominance_frontiers(cfg, idom)
+
+        defsites = self.find_defsites(cfg)
+        live_in = self.live_blocks(cfg, defsites)
+        phis = self.place_phis(cfg, defsites, live_in, frontiers)
+        self.rename(cfg, children, phis, defsites)
+        self.remove_trivial_phis(cfg)
+
+    def find_defsites(self, cfg):
+        # Zmienne do przemianowania: zmienne źródłowe, parametry i rejestry
+        # tymczasowe definiowane więcej niż raz (np. wynik && i ||)
+        defsites = {param: {0} for param in cfg.definition.params or []}
+        counts = {}
+        for block in cfg.blocks:
+            for instruction in block.instructions:
+                result = instruction_def(instruction)
+                if result is not None:
+                    counts[result] = counts.get(result, 0) + 1
+                    if isinstance(result, Var) or isinstance(instruction, Assignment) or counts[result] > 1:
+                        defsites.setdefault(result, set())
+
+        for block in cfg.blocks:
+            for instruction in block.instructions:
+                result = instruction_def(instruction)
+                if result in defsites:
+                    defsites[result].add(block.index)
+        return defsites
+
+    def live_blocks(self, cfg, defsites):
+        # Bloki, na których wejściu zmienna jest żywa: od użyć niepoprzedzonych
+        # definicją w tym samym bloku idziemy wstecz aż do bloków ją definiujących
+        exposed = {}
+        for block in cfg.blocks:
+            defined = set()
+            for instruction in block.instructions:
+                for operand in instruction_uses(instruction):
+                    if operand in defsites and operand not in defined:
+                        exposed.setdefault(operand, set()).add(block.index)
+                result = instruction_def(instruction)
+                if result in defsites:
+                    defined.add(result)
+
+        live_in = {}
+        for variable, blocks in exposed.items():
+            live = set(blocks)
+            worklist = list(blocks)
+            sites = defsites[variable]
+            while worklist:
+                index = worklist.pop()
+                for pred in cfg.pred[index]:
+                    if pred not in live and pred not in sites:
+                        live.add(pred)
+                        worklist.append(pred)
+            live_in[variable] = live
+        return live_in
+
+    def place_phis(self, cfg, defsites, live_in, frontiers):
+        phis = [[] for _ in cfg.blocks]
+        for variable, sites in defsites.items():
+            live = live_in.get(variable)
+            if not live:
+                continue
+            has_phi = set()
+            worklist = list(sites)
+            while worklist:
+                index = worklist.pop()
+                for frontier in frontiers[index]:
+                    if frontier in has_phi:
+                        continue
+                    has_phi.add(frontier)
+                    if frontier in live:
+                        phis[frontier].append((variable, Phi(result=self.new_temp(variable.type), incoming=[])))
+                        self.phis_placed += 1
+                    if frontier not in sites:
+                        worklist.append(frontier)
+        return phis
+
+    def rename(self, cfg, children, phis, defsites):
+        current = {param: [param] for param in cfg.definition.params or []}
+
+        def lookup(operand):
+            stack = current.get(operand)
+            if not stack:
+                if isinstance(operand, Var):
+                    raise Exception(f"Variable {operand} may be used before assignment")
+                # Rejestr definiowany wiele razy bez definicji na tej ścieżce to błąd
+                # wcześniejszego przebiegu; nie zostawiamy w wyniku nazwy sprzed SSA
+                if operand in defsites:
+                    raise Exception(f"Register {operand} has no definition reaching its use")
+                return operand
+            return stack[-1]
+
+        def push(variable, value, pushed):
+            current.setdefault(variable, []).append(value)
+            pushed.append(variable)
+
+        # Drzewo dominatorów przechodzimy bez rekurencji, jak wyrażenia w eval_expr
+        walk = [(0, False)]
+        undo = {}
+        while walk:
+            index, leaving = walk.pop()
+            if leaving:
+                for variable in undo.pop(index):
+                    current[variable].pop()
+                continue
+
+            block = cfg.blocks[index]
+            pushed = []
+            for variable, phi in phis[index]:
+                push(variable, phi.result, pushed)
+
+            renamed = [phi for _, phi in phis[index]]
+            for instruction in block.instructions:
+                rewrite_uses(instruction, lookup)
+                if isinstance(instruction, Assignment):
+                    push(instruction.variable, instruction.value, pushed)
+                    continue
+                result = instruction_def(instruction)
+                if result in defsites:
+                    # Instrukcja liczy nową wersję zmiennej do świeżego rejestru
+                    instruction.result = self.new_temp(result.type)
+                    push(result, instruction.result, pushed)
+                renamed.append(instruction)
+            block.instructions = renamed
+
+            for successor in cfg.succ[index]:
+                for variable, phi in phis[successor]:
+                    phi.incoming.append((block.label, lookup(variable)))
+
+            undo[index] = pushed
+            walk.append((index, True))
+            for child in reversed(children[index]):
+                walk.append((child, False))
+
+    def remove_trivial_phis(self, cfg):
+        # phi, którego wszystkie wejścia (poza nim samym) to ta sama wartość, jest zbędne
+        replacement = {}
+
+        def resolve(operand):
+            while operand in replacement:
+                operand = replacement[operand]
+            return operand
+
+        changed = True
+        while changed:
+            changed = False
+            for block in cfg.blocks:
+                kept = []
+                for instruction in block.instructions:
+                    if isinstance(instruction, Phi):
+                        values = {resolve(value) for _, value in instruction.incoming}
+                        values.discard(instruction.result)
+                        if len(values) == 1:
+                            replacement[instruction.result] = values.pop()
+                            self.phis_removed += 1
+                            changed = True
+                            continue
+                    kept.append(instruction)
+                block.instructions = kept
+
+        if replacement:
+            for block in cfg.blocks:
+                for instruction in block.instructions:
+                    rewrite_uses(instruction, resolve)
+
+
+def to_ssa(quadruples, builder=None):
+    if builder is None:
+        builder = SSABuilder(max_temp_index(quadruples) + 1)
+    functions = build_cfg(quadruples)
+    for cfg in functions:
+        builder.run(cfg)
+    return flatten(functions)
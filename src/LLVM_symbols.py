@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+
+
+@dataclass(eq=False)
+class Symbol:
+    name: str
+    type: str
+    unique: str  # Nazwa unikalna w całym programie, np. x_block3
+    scope_id: int = 0
+
+
+class SymbolTable:
+    # Dla każdej nazwy trzymamy łańcuch przesłaniających się deklaracji (ostatnia
+    # jest widoczna), a dla każdego zakresu listę nazw w nim zadeklarowanych.
+    # Wyszukiwanie i deklaracja są O(1), exit_block cofa tylko wpisy swojego zakresu.
+    def __init__(self):
+        self.chains = {}
+        self.scopes = [[]]
+        self.scope_ids = [0]
+        self.block_counter = 0
+
+    def enter_block(self):
+        self.block_counter += 1
+        self.scopes.append([])
+        self.scope_ids.append(self.block_counter)
+
+    def exit_block(self):
+        if len(self.scopes) == 1:
+            raise Exception("Attempted to exit global scope")
+
+        for var_name in self.scopes.pop():
+            chain = self.chains[var_name]
+            chain.pop()
+            if not chain:
+                del self.chains[var_name]
+        self.scope_ids.pop()
+
+    def declare_variable(self, var_name, var_type, value_tree=None):
+        scope_id = self.scope_ids[-1]
+        chain = self.chains.get(var_name)
+        if chain is None:
+            chain = self.chains[var_name] = []
+        elif chain[-1].scope_id == scope_id:
+            raise Exception(f"Variable {var_name} already declared in this scope")
+
+        symbol = Symbol(var_name, var_type, f"{var_name}_block{scope_id}", scope_id)
+        chain.append(symbol)
+        self.scopes[-1].append(var_name)
+        return symbol
+
+    def get_symbol(self, var_name):
+        chain = self.chains.get(var_name)
+        if chain is None:
+            return None
+        return chain[-1]
+
+    def get_variable_type(self, var_name):
+        chain = self.chains.get(var_name)
+        if chain is None:
+            return None
+        return chain[-1].type
+
+    def reset(self):
+        self.chains = {}
+        self.scopes = [[]]
+        self.scope_ids = [0]
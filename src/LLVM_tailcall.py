@@ -0,0 +1,153 @@
+from src.IRdataclasses import *
+from src.IRoperands import Const, BLOCK_START, BLOCK_END
+from src.LLVM_cfg import BasicBlock
+
+# Eliminacja rekurencji ogonowej przed SSA. Wywołanie samej siebie, po którym
+# od razu jest return jego wyniku (albo koniec funkcji void), zastępujemy
+# przypisaniem argumentów do parametrów i skokiem na początek ciała. Tak samo
+# return x + f(...) i return x * f(...): dodawanie i mnożenie i32 są łączne
+# i przemienne, więc x trafia do akumulatora, a pozostałe return zwracają
+# akumulator połączony ze swoją wartością.
+# Po optymalizacjach pozostałe wywołania w pozycji ogonowej dostają znacznik
+# tail, a musttail, gdy wywoływana funkcja ma ten sam typ co wywołująca.
+
+ACCUMULATORS = {'plus_op': 0, 'times_op': 1}
+
+
+def scope_marker(instruction):
+    return isinstance(instruction, Label) and (instruction.name is BLOCK_START or instruction.name is BLOCK_END)
+
+
+def reaches_exit(cfg, index, start=0):
+    # Czy od instrukcji start bloku sterowanie dochodzi do końca funkcji void,
+    # nie wykonując nic poza znacznikami bloków (ewentualnie przez puste bloki)
+    seen = set()
+    while index not in seen:
+        seen.add(index)
+        instructions = cfg.blocks[index].instructions
+        rest = instructions[start:]
+        if rest and isinstance(rest[-1], ReturnStatement) and rest[-1].value is None:
+            rest = rest[:-1]
+            if all(scope_marker(instruction) for instruction in rest):
+                return True
+        if not all(scope_marker(instruction) for instruction in rest):
+            return False
+        successors = cfg.succ[index]
+        if not successors:
+            return True
+        if len(successors) != 1:
+            return False
+        index, start = successors[0], 0
+    return False
+
+
+def tail_call(cfg, block, void):
+    # (pozycja wywołania, wywołanie, operator akumulatora, drugi argument, czy ret jest
+    # zaraz po wywołaniu w tym samym bloku) albo None
+    instructions = block.instructions
+    if not instructions:
+        return None
+    last = instructions[-1]
+    if isinstance(last, ReturnStatement) and last.value is not None:
+        if len(instructions) >= 2:
+            call = instructions[-2]
+            if isinstance(call, FunctionCall) and call.result is last.value:
+                return len(instructions) - 2, call, None, None, True
+        if len(instructions) >= 3:
+            operation, call = instructions[-2], instructions[-3]
+            if (isinstance(operation, BinaryOperation) and operation.operator in ACCUMULATORS
+                    and operation.result is last.value and isinstance(call, FunctionCall)
+                    and call.result is not None and (operation.left is call.result) != (operation.right is call.result)):
+                other = operation.right if operation.left is call.result else operation.left
+                return len(instructions) - 3, call, operation.operator, other, True
+        return None
+
+    # W funkcji void po wywołaniu mogą być już tylko znaczniki bloków i return
+    if not void:
+        return None
+    position = len(instructions) - 1
+    while position >= 0 and (scope_marker(instructions[position]) or isinstance(instructions[position], ReturnStatement)):
+        position -= 1
+    call = instructions[position] if position >= 0 else None
+    if isinstance(call, FunctionCall) and call.result is None and reaches_exit(cfg, block.index, position + 1):
+        direct = not cfg.succ[block.index] and all(scope_marker(instruction) or isinstance(instruction, ReturnStatement)
+                                                   for instruction in instructions[position + 1:])
+        return position, call, None, None, direct
+    return None
+
+
+def eliminate_tail_calls(cfg, new_temp):
+    # Wywołanie samej siebie bez wyniku jest możliwe tylko w funkcji void
+    void = all(instruction.value is None for block in cfg.blocks for instruction in block.instructions
+               if isinstance(instruction, ReturnStatement))
+    sites = []
+    for block in cfg.blocks:
+        site = tail_call(cfg, block, void)
+        if site is not None and site[1].name == cfg.name:
+            sites.append((block,) + site)
+
+    # Akumulator obsługuje tylko jedno działanie naraz
+    operators = {operator for _, _, _, operator, _, _ in sites if operator is not None}
+    if len(operators) > 1:
+        sites = [site for site in sites if site[3] is None]
+        operators = set()
+    if not sites:
+        return 0
+
+    # Dotychczasowy blok wejściowy staje się nagłówkiem pętli, wejście zostaje puste
+    # (albo z inicjalizacją akumulatora), bo do bloku wejściowego nie wolno skakać
+    entry = cfg.blocks[0]
+    header = BasicBlock(1, cfg.new_label(), entry.instructions)
+    entry.instructions = []
+    cfg.blocks.insert(1, header)
+
+    accumulator = None
+    if operators:
+        operator = operators.pop()
+        accumulator = new_temp('int')
+        entry.instructions.append(Assignment(variable=accumulator, value=Const(ACCUMULATORS[operator], 'int')))
+        recursive = {id(block) for block, *_ in sites}
+        for block in cfg.blocks:
+            last = block.instructions[-1] if block.instructions else None
+            if isinstance(last, ReturnStatement) and id(block) not in recursive:
+                result = new_temp('int')
+                block.instructions[-1:] = [
+                    BinaryOperation(left=accumulator, operator=operator, right=last.value, result=result),
+                    ReturnStatement(value=result),
+                ]
+
+    params = cfg.definition.params or []
+    for block, position, call, operator, other, _ in sites:
+        replacement = []
+        if operator is not None:
+            replacement.append(BinaryOperation(left=accumulator, operator=operator, right=other, result=accumulator))
+        # Argumenty mogą czytać parametry, więc najpierw kopie, potem przypisania
+        copies = [new_temp(param.type) for param in params]
+        replacement.extend(Assignment(variable=copy, value=argument) for copy, argument in zip(copies, call.params))
+        replacement.extend(Assignment(variable=param, value=copy) for param, copy in zip(params, copies))
+        replacement.append(Jump(target=header.label))
+        block.instructions[position:] = replacement
+
+    cfg.compute_edges()
+    return len(sites)
+
+
+def signature(function_table, name):
+    entry = function_table[name]
+    return entry['return_type'], [param_type for param_type, _ in entry['params']]
+
+
+def mark_tail_calls(cfg, function_table=None):
+    void = function_table is not None and function_table[cfg.name]['return_type'] == 'void'
+    marked = 0
+    for block in cfg.blocks:
+        site = tail_call(cfg, block, void)
+        if site is None or site[2] is not None:
+            continue
+        _, call, _, _, direct = site
+        # musttail wymaga ret zaraz za wywołaniem i tego samego typu funkcji
+        same_type = (direct and function_table is not None and call.name in function_table
+                     and signature(function_table, call.name) == signature(function_table, cfg.name))
+        call.tail = 'musttail' if same_type else 'tail'
+        marked += 1
+    return marked
@@ -0,0 +1,106 @@
+from types import GeneratorType
+from lark.visitors import Visitor
+from lark import Tree
+
+
+class DispatchVisitor(Visitor):
+    # Podklasy podają nazwy metod; tablice z funkcjami budowane są raz na klasę,
+    # a nie przy każdym odwiedzanym węźle
+    visit_handlers = {}
+    expr_handlers = {}
+    passthrough_nodes = frozenset()
+    expr_passthrough_nodes = frozenset()
+    # Jeśli podklasa ustawi tu słownik, wynik każdego wyrażenia złożonego (obliczanego
+    # przez generator) trafia do niego pod id(węzła); liście nie są zapisywane
+    expr_results = None
+    # Jeśli podklasa ustawi tu słownik id(węzła) -> stała albo poddrzewo (Annotations.folded),
+    # zwinięty węzeł nie jest obliczany: stała wraca wprost, a poddrzewo liczone jest zamiast niego
+    expr_folded = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._visit_table = {data: getattr(cls, name) for data, name in cls.visit_handlers.items()}
+        cls._expr_table = {data: getattr(cls, name) for data, name in cls.expr_handlers.items()}
+
+    def visit(self, tree):
+        handler = self._visit_table.get(tree.data)
+        if handler is not None:
+            return handler(self, tree)
+
+        # Węzły, które wymagają tylko odwiedzenia poddrzew
+        if tree.data in self.passthrough_nodes:
+            for child in tree.children:
+                if isinstance(child, Tree):
+                    self.visit(child)
+            return None
+
+        raise Exception(f"Unhandled node type: {tree.data}")
+
+    def eval_expr(self, tree):
+        # Wyrażenia liczone są na jawnym stosie zamiast rekurencją Pythona.
+        # Handler złożonego wyrażenia jest generatorem: `yield poddrzewo` zleca
+        # obliczenie dziecka i dostaje z powrotem jego wartość. Długie łańcuchy
+        # a + b + c + ... nie zużywają więc stosu Pythona.
+        results = self.expr_results
+        folded = self.expr_folded
+        table = self._expr_table
+
+        if folded is not None:
+            replacement = folded.get(id(tree))
+            while isinstance(replacement, Tree):
+                tree = replacement
+                replacement = folded.get(id(tree))
+            if replacement is not None:
+                return replacement
+
+        value = self._eval_node(tree)
+        if type(value) is not GeneratorType:
+            return value
+
+        generators = [value]
+        nodes = [tree]
+        value = None
+        while generators:
+            try:
+                child = generators[-1].send(value)
+            except StopIteration as stop:
+                generators.pop()
+                node = nodes.pop()
+                value = stop.value
+                if results is not None:
+                    results[id(node)] = value
+                continue
+
+            if folded is not None:
+                replacement = folded.get(id(child))
+                while isinstance(replacement, Tree):
+                    child = replacement
+                    replacement = folded.get(id(child))
+                if replacement is not None:
+                    value = replacement
+                    continue
+
+            handler = table.get(child.data)
+            value = handler(self, child) if handler is not None else self._eval_node(child)
+            if type(value) is GeneratorType:
+                generators.append(value)
+                nodes.append(child)
+                value = None
+
+        return value
+
+    def _eval_node(self, tree):
+        handler = self._expr_table.get(tree.data)
+        if handler is not None:
+            return handler(self, tree)
+
+        if tree.data in self.expr_passthrough_nodes:
+            return self._eval_passthrough(tree)
+
+        raise Exception(f"Unsupported expression type: {tree.data}")
+
+    def _eval_passthrough(self, tree):
+        for child in tree.children:
+            if isinstance(child, Tree):
+                return (yield child)
+        return None
@@ -2,36 +2,249 @@
 #include <stdio.h>
 #include <string>
 #include <cstdlib>
+#include <cstring>
+#include <signal.h>
+#include <unistd.h>
 
 using namespace std;
 
+// Interfejs w C, bo wywołuje go kod LLVM, a nazwy funkcji nie są dekorowane jak w C++.
+//
+// Napisy Latte są niezmienne, więc kopia napisu to kopia wskaźnika: bufor ma
+// licznik referencji, który kod wygenerowany zwiększa (retainString) przy
+// przypisaniu i zmniejsza (releaseString), gdy zmienna dostaje nową wartość
+// albo wychodzi z zakresu. Nowe napisy z Concat i readString mają licznik 1
+// należący do wywołującego, a funkcje runtime'u tylko pożyczają argumenty.
+// Literały są globalnymi stałymi w module LLVM o tym samym układzie
+// ({ i32, i32, i8*, i8*, [n x i8] }, bez bufora, znaki w tej samej stałej)
+// z licznikiem STATIC_REFCOUNT i nigdy nie są zwalniane.
+//
+// Napis to widok na początek współdzielonego bufora. Concat dopisuje drugi
+// argument w miejscu, gdy pierwszy kończy się dokładnie tam, gdzie zapisana
+// część bufora, i jest miejsce; nowy napis to wtedy dłuższy widok na ten sam
+// bufor, a krótszy widok się nie zmienia, bo znaków przed końcem nikt nie
+// nadpisuje. Przy braku miejsca bufor dla napisu, który już jest wynikiem
+// dopisywania, rośnie dwukrotnie, więc s = s + x w pętli kosztuje
+// zamortyzowane O(|x|). Znaki widoku są zawsze ciągłe, więc odczyt
+// (printString, porównanie) nie musi niczego scalać. Z -DLATTE_COPY_CONCAT
+// Concat zawsze kopiuje oba argumenty do nowego bufora dokładnego rozmiaru.
+//
+// Domyślnie wyjście idzie przez własny bufor i jest wypisywane dopiero, gdy
+// bufor się zapełni, przed wczytaniem danych, w error() i przy wyjściu
+// z programu, także przez SIGFPE (dzielenie przez zero) i SIGSEGV: obsługa
+// tych sygnałów wypisuje bufor i kończy program tym samym sygnałem. Inne
+// sygnały (np. SIGKILL, SIGINT) nadal gubią niewypisaną część, a wyjście
+// przeplata się ze stderr inaczej niż wiersz po wierszu. Z -DLATTE_UNBUFFERED
+// każdy wiersz jest wypisywany od razu (cout << ... << endl), jak w pierwszej
+// wersji środowiska.
+
+struct StringBuffer {
+    int refcount;
+    int capacity;
+    int used;
+    char data[];
+};
+
+struct LatteString {
+    int refcount;
+    int length;
+    const char* chars;  // length znaków, bez zera na końcu
+    StringBuffer* buffer;  // NULL dla literałów
+};
+
+static const int STATIC_REFCOUNT = -1;
+
+static StringBuffer* newBuffer(size_t capacity) {
+    StringBuffer* buffer = (StringBuffer*) malloc(sizeof(StringBuffer) + capacity);
+    buffer->refcount = 0;
+    buffer->capacity = capacity;
+    buffer->used = 0;
+    return buffer;
+}
+
+static LatteString* newView(StringBuffer* buffer, size_t length) {
+    LatteString* s = (LatteString*) malloc(sizeof(LatteString));
+    s->refcount = 1;
+    s->length = length;
+    s->chars = buffer->data;
+    s->buffer = buffer;
+    buffer->refcount++;
+    return s;
+}
+
+// Po readInt reszta wiersza (np. znak nowej linii) nie należy do następnego napisu
+static bool afterInt = false;
+
+#ifndef LATTE_UNBUFFERED
+
+static const size_t OUTPUT_SIZE = 1 << 16;
+static char output[OUTPUT_SIZE];
+static size_t outputUsed = 0;
+
+static void writeAll(const char* data, size_t length) {
+    while (length > 0) {
+        ssize_t written = write(STDOUT_FILENO, data, length);
+        if (written <= 0)
+            return;
+        data += written;
+        length -= written;
+    }
+}
+
+static void flushOutput() {
+    writeAll(output, outputUsed);
+    outputUsed = 0;
+}
+
+// Błąd wykonania kończy program sygnałem; przedtem wypisujemy bufor (write()
+// wolno wołać w obsłudze sygnału). Obsługa działa na osobnym stosie, bo
+// SIGSEGV to zwykle przepełniony stos przy zbyt głębokiej rekursji, a po niej
+// wraca domyślna obsługa (SA_RESETHAND) i ten sam sygnał kończy program
+static char signalStack[1 << 16];
+
+static void flushAndReraise(int sig) {
+    flushOutput();
+    raise(sig);
+}
+
+// Konstruktor obiektu statycznego wykonuje się przed main, destruktor po
+// powrocie z main i przy exit()
+static struct OutputFlusher {
+    OutputFlusher() {
+        stack_t stack = {};
+        stack.ss_sp = signalStack;
+        stack.ss_size = sizeof(signalStack);
+        sigaltstack(&stack, NULL);
+        struct sigaction action = {};
+        action.sa_handler = flushAndReraise;
+        action.sa_flags = SA_ONSTACK | SA_RESETHAND;
+        sigaction(SIGFPE, &action, NULL);
+        sigaction(SIGSEGV, &action, NULL);
+    }
+    ~OutputFlusher() { flushOutput(); }
+} outputFlusher;
+
+static void appendOutput(const char* data, size_t length) {
+    if (outputUsed + length > OUTPUT_SIZE) {
+        flushOutput();
+        if (length > OUTPUT_SIZE) {
+            writeAll(data, length);
+            return;
+        }
+    }
+    memcpy(output + outputUsed, data, length);
+    outputUsed += length;
+}
+
+#else
+
+static void flushOutput() {}
+
+#endif
+
+extern "C" {
+
+#ifndef LATTE_UNBUFFERED
+
+void printInt(int n){
+    // Cyfry od końca; moduł liczymy na unsigned, żeby -2^31 też się zmieścił
+    char digits[12];
+    char* end = digits + sizeof(digits);
+    char* start = end;
+    *--start = '\n';
+    unsigned int value = n < 0 ? 0u - (unsigned int) n : (unsigned int) n;
+    do {
+        *--start = '0' + value % 10;
+        value /= 10;
+    } while (value != 0);
+    if (n < 0)
+        *--start = '-';
+    appendOutput(start, end - start);
+}
+
+void printString(const LatteString* s){
+    appendOutput(s->chars, s->length);
+    appendOutput("\n", 1);
+}
+
+#else
 
 void printInt(int n){
     cout << n << endl;
 }
 
-void printString(const string& s){
-    cout << s << endl;
+void printString(const LatteString* s){
+    cout.write(s->chars, s->length) << endl;
 }
 
+#endif
+
 int readInt() {
+    flushOutput();
     int n;
     cin >> n;
+    afterInt = true;
     return n;
 }
 
-string readString() {
-    string s;
-    cin.ignore();
-    getline(cin, s);
-    return s;
+LatteString* readString() {
+    flushOutput();
+    string line;
+    if (afterInt) {
+        getline(cin, line);
+        afterInt = false;
+    }
+    getline(cin, line);
+    StringBuffer* buffer = newBuffer(line.size());
+    memcpy(buffer->data, line.data(), line.size());
+    buffer->used = line.size();
+    return newView(buffer, line.size());
 }
 
 void error() {
+    flushOutput();
     cerr << "runtime error" << endl;
     exit(1);
 }
 
-string Concat(const string& s1, const string& s2){
-    return s1 + s2;
-}
\ No newline at end of file
+void retainString(LatteString* s){
+    if (s->refcount != STATIC_REFCOUNT)
+        s->refcount++;
+}
+
+void releaseString(LatteString* s){
+    if (s->refcount == STATIC_REFCOUNT || --s->refcount != 0)
+        return;
+    if (--s->buffer->refcount == 0)
+        free(s->buffer);
+    free(s);
+}
+
+LatteString* Concat(const LatteString* s1, const LatteString* s2){
+    size_t length = s1->length + s2->length;
+    StringBuffer* buffer = s1->buffer;
+#ifndef LATTE_COPY_CONCAT
+    if (buffer != NULL && buffer->used == s1->length) {
+        if (length <= (size_t) buffer->capacity) {
+            memcpy(buffer->data + buffer->used, s2->chars, s2->length);
+            buffer->used = length;
+            return newView(buffer, length);
+        }
+        buffer = newBuffer(2 * length);
+    } else {
+        buffer = newBuffer(length);
+    }
+#else
+    buffer = newBuffer(length);
+#endif
+    memcpy(buffer->data, s1->chars, s1->length);
+    memcpy(buffer->data + s1->length, s2->chars, s2->length);
+    buffer->used = length;
+    return newView(buffer, length);
+}
+
+int stringsEqual(const LatteString* s1, const LatteString* s2){
+    return s1 == s2 || (s1->length == s2->length && memcmp(s1->chars, s2->chars, s1->length) == 0);
+}
+
+}